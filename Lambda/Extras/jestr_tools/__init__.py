@@ -0,0 +1,17 @@
+"""Maintenance tools for the Memes table, the meme S3 bucket and the bundled
+meme assets. Run them through one entry point:
+
+    cd Lambda/Extras && python -m jestr_tools --help
+
+Modules only import boto3, numpy or Pillow when a command actually needs them,
+so importing the package (or asking for --help) stays cheap.
+
+The tests run against moto and stubbed clients, never real AWS:
+
+    cd Lambda/Extras && python -m pytest jestr_tools/tests
+"""
+import os
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXTRAS_DIR = os.path.dirname(PACKAGE_DIR)
+REPO_ROOT = os.path.normpath(os.path.join(EXTRAS_DIR, '../..'))
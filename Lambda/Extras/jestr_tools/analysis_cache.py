@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from . import REPO_ROOT
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join(REPO_ROOT, 'src/services/retired/.meme_tagger_cache.sqlite')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Evict down to this fraction of max_bytes so we aren't evicting on every put
+EVICT_TO = 0.9
+COMMIT_EVERY = 200
+
+
+class AnalysisCache:
+    """Persistent Rekognition results for meme_tagger, in SQLite.
+
+    Results are keyed by S3 ETag, so an unchanged object (or a byte-identical
+    copy under another key) never goes back through detect_labels/detect_text.
+    A second table remembers which ETag each key was last written to DynamoDB
+    with, which is what incremental runs use to skip unchanged images entirely.
+    When the stored results grow past max_bytes, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS analysis ('
+            ' etag TEXT PRIMARY KEY,'
+            ' tags TEXT NOT NULL,'
+            ' detected_text TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS written (key TEXT PRIMARY KEY, etag TEXT NOT NULL)')
+        self._db.commit()
+
+    def get(self, etag):
+        """Return (tags, detected_text) for an ETag, or None."""
+        with self._lock:
+            row = self._db.execute('SELECT tags, detected_text FROM analysis WHERE etag = ?', (etag,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute('UPDATE analysis SET last_used = ? WHERE etag = ?', (time.time(), etag))
+            self._maybe_commit()
+            return json.loads(row[0]), row[1]
+
+    def put(self, etag, tags, detected_text):
+        tags_json = json.dumps(tags)
+        size = len(etag) + len(tags_json) + len(detected_text.encode('utf-8'))
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO analysis (etag, tags, detected_text, size, last_used) VALUES (?, ?, ?, ?, ?)',
+                (etag, tags_json, detected_text, size, time.time())
+            )
+            self._maybe_commit()
+
+    def is_current(self, key, etag):
+        """True if key was already written to DynamoDB with this exact ETag."""
+        with self._lock:
+            row = self._db.execute('SELECT etag FROM written WHERE key = ?', (key,)).fetchone()
+            return row is not None and row[0] == etag
+
+    def mark_written(self, key, etag):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO written (key, etag) VALUES (?, ?)', (key, etag))
+            self._maybe_commit()
+
+    def _maybe_commit(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self._evict()
+            self._db.commit()
+            self._uncommitted = 0
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM analysis').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * EVICT_TO)
+        freed = 0
+        evicted = []
+        for etag, size in self._db.execute('SELECT etag, size FROM analysis ORDER BY last_used'):
+            evicted.append((etag,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany('DELETE FROM analysis WHERE etag = ?', evicted)
+        logger.info(f"Evicted {len(evicted)} cached analyses ({freed} bytes)")
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,148 @@
+import functools
+import os
+import threading
+
+# One boto3 session shared by every tool, with clients created on first use.
+#
+# botocore's default pool is 10 connections per client, which caps the scan
+# and write workers well below what they're configured for. Clients made here
+# get a pool sized for the worker counts, TCP keep-alive so idle pooled
+# connections survive between pages, and the adaptive retry mode, which backs
+# off on throttling before a request ever reaches our own retry loops.
+
+DEFAULT_REGION = 'us-east-2'
+DEFAULT_MAX_POOL_CONNECTIONS = 64
+DEFAULT_MAX_ATTEMPTS = 3
+
+settings = {
+    'region': None,
+    'max_pool_connections': DEFAULT_MAX_POOL_CONNECTIONS,
+    'tcp_keepalive': True,
+    'retry_mode': 'adaptive',
+    'max_attempts': DEFAULT_MAX_ATTEMPTS,
+}
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+_resources = {}
+
+
+def configure(**overrides):
+    """Change the client settings. Only affects clients created afterwards."""
+    global _session
+    unknown = set(overrides) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown AWS settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update({name: value for name, value in overrides.items() if value is not None})
+        # The region is fixed when the session is made
+        if overrides.get('region') is not None:
+            _session = None
+        _clients.clear()
+        _resources.clear()
+
+
+def add_arguments(parser):
+    parser.add_argument('--region', default=None, help=f"AWS region (default: environment or profile, then {DEFAULT_REGION})")
+    parser.add_argument('--max-pool-connections', type=int, default=None,
+                        help=f"HTTP connections per client (default: {DEFAULT_MAX_POOL_CONNECTIONS})")
+    parser.add_argument('--retry-mode', choices=('adaptive', 'standard', 'legacy'), default=None,
+                        help="botocore retry mode (default: adaptive)")
+    parser.add_argument('--max-attempts', type=int, default=None,
+                        help=f"botocore attempts per request (default: {DEFAULT_MAX_ATTEMPTS})")
+    parser.add_argument('--no-keepalive', dest='tcp_keepalive', action='store_false', default=None,
+                        help="Turn off TCP keep-alive on pooled connections")
+
+
+def configure_from_args(args):
+    configure(region=args.region, max_pool_connections=args.max_pool_connections, retry_mode=args.retry_mode,
+              max_attempts=args.max_attempts, tcp_keepalive=args.tcp_keepalive)
+
+
+def pin_region(region=DEFAULT_REGION):
+    """Use `region` unless --region or AWS_REGION/AWS_DEFAULT_REGION names one,
+    ignoring the profile. For tools that have always run against one region."""
+    if not (settings['region'] or os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION')):
+        configure(region=region)
+
+
+def client_config():
+    from botocore.config import Config # type: ignore
+    return Config(
+        max_pool_connections=settings['max_pool_connections'],
+        tcp_keepalive=settings['tcp_keepalive'],
+        retries={'mode': settings['retry_mode'], 'max_attempts': settings['max_attempts']},
+    )
+
+
+def session():
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3 # type: ignore
+            # Without --region, boto3 resolves it from the environment or the
+            # profile in ~/.aws/config; the default only fills in if neither has one
+            _session = boto3.session.Session(region_name=settings['region'] or os.environ.get('AWS_REGION'))
+            if _session.region_name is None:
+                _session = boto3.session.Session(region_name=DEFAULT_REGION)
+        return _session
+
+
+def client(name):
+    # Sessions aren't thread-safe to create clients from, so creation is serialized
+    current = session()
+    with _lock:
+        if name not in _clients:
+            _clients[name] = current.client(name, config=client_config())
+        return _clients[name]
+
+
+def resource(name):
+    current = session()
+    with _lock:
+        if name not in _resources:
+            _resources[name] = current.resource(name, config=client_config())
+        return _resources[name]
+
+
+def reset():
+    """Forget the session and clients, e.g. after changing AWS_* environment variables."""
+    global _session
+    with _lock:
+        _session = None
+        _clients.clear()
+        _resources.clear()
+
+
+class Lazy:
+    """Stands in for a boto3 object, calling factory() for it whenever an
+    attribute is looked up, so nothing is created until it's used."""
+
+    def __init__(self, factory, label):
+        self._factory = factory
+        self._label = label
+
+    def __getattr__(self, attr):
+        return getattr(self._factory(), attr)
+
+    def __repr__(self):
+        return f"Lazy({self._label})"
+
+
+def LazyClient(name):
+    return Lazy(functools.partial(client, name), f"client {name!r}")
+
+
+def LazyTable(name):
+    cached = (None, None)
+
+    def table():
+        nonlocal cached
+        # Rebuilt only if configure()/reset() replaced the resource
+        dynamodb = resource('dynamodb')
+        if cached[0] is not dynamodb:
+            cached = (dynamodb, dynamodb.Table(name))
+        return cached[1]
+
+    return Lazy(table, f"table {name!r}")
@@ -0,0 +1,104 @@
+import gzip
+import json
+import logging
+import math
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# Rough per-request latency used to project run time when no WCU cap is set
+ASSUMED_WRITE_LATENCY = 0.015
+
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Can't write value of type {type(value).__name__} to a plan")
+
+
+def attribute_size(value):
+    # Follows DynamoDB's item size rules closely enough for capacity estimates
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (int, float, Decimal)):
+        digits = len(str(abs(value)).replace('.', '').lstrip('0')) or 1
+        return math.ceil(digits / 2) + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode('utf-8')) + attribute_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 3 + sum(attribute_size(v) + 1 for v in value)
+    return len(str(value).encode('utf-8'))
+
+
+def estimate_write_units(item):
+    """WCUs for writing `item` (attribute name -> value): one per started KB."""
+    size = sum(len(name.encode('utf-8')) + attribute_size(value) for name, value in item.items())
+    return max(1, math.ceil(size / 1024))
+
+
+class PlanWriter:
+    """Writes a gzip'd JSON-lines plan: a header line, then one [key, values]
+    line per item. Safe to share between scan worker threads."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = dict(header, type='plan', created=datetime.now().isoformat())
+        self.count = 0
+        self.estimated_wcu = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._file.write(json.dumps(self.header) + '\n')
+
+    def add(self, key, values, write_units):
+        line = json.dumps([key, values], default=_encode, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+            self.estimated_wcu += write_units
+
+    def close(self):
+        # Totals go in a trailer since the header is written before the scan
+        self._file.write(json.dumps({'type': 'summary', 'count': self.count, 'estimated_wcu': self.estimated_wcu}) + '\n')
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_plan(path):
+    """Returns (header, entries) where entries lazily yields (key, values)."""
+    f = gzip.open(path, 'rt', encoding='utf-8')
+    header = json.loads(f.readline())
+    if header.get('type') != 'plan':
+        f.close()
+        raise ValueError(f"{path} is not a backfill plan")
+
+    def entries():
+        with f:
+            for line in f:
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    continue
+                yield record[0], record[1]
+
+    return header, entries()
+
+
+def projected_seconds(count, estimated_wcu, write_workers, max_wcu=None):
+    by_latency = count * ASSUMED_WRITE_LATENCY / max(1, write_workers)
+    by_capacity = estimated_wcu / max_wcu if max_wcu else 0
+    return max(by_latency, by_capacity)
+
+
+def format_summary(count, estimated_wcu, seconds):
+    return (f"{count} items would be updated, ~{estimated_wcu} WCU, "
+            f"projected run time {seconds / 60:.1f} min")
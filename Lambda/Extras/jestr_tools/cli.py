@@ -0,0 +1,44 @@
+import argparse
+import importlib
+import sys
+
+from . import aws
+
+# command -> (module, summary). Modules are imported only when their command
+# runs, so `--help` never pays for boto3, numpy or Pillow.
+COMMANDS = {
+    'process-memes': ('process_memes', "Backfill memes that have a blank email (plan/apply/snapshot)"),
+    'update-captions': ('update_meme_captions', "Regenerate captions for every meme"),
+    'tag-memes': ('meme_tagger', "Tag memes in S3 with Rekognition labels and text"),
+    'phash': ('phash_index', "Perceptual-hash index for finding near-duplicate memes"),
+    'search-index': ('meme_search_index', "Build and query the offline meme tag/text index"),
+    'sync-assets': ('sync_assets', "Incrementally name bundled meme assets"),
+    'normalize-assets': ('normalize_assets', "Re-encode bundled meme assets and build feed thumbnails"),
+    'load-test': ('load_test', "Benchmark the Memes backfill scripts against a local table"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m jestr_tools',
+        description="Jestr maintenance tools. AWS options go before the command; "
+                    "run '<command> --help' for the command's own options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + '\n'.join(f"  {name:<18} {summary}" for name, (_, summary) in COMMANDS.items())
+    )
+    aws.add_arguments(parser)
+    parser.add_argument('command', choices=sorted(COMMANDS), metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    aws.configure_from_args(args)
+    module = importlib.import_module(f'{__package__}.{COMMANDS[args.command][0]}')
+    module.main(args.args, prog=f'python -m jestr_tools {args.command}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import functools
+import glob
+import gzip
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .metrics import registry
+
+# Reads a DynamoDB "Export to S3" in DynamoDB-JSON format after it has been
+# copied down locally (aws s3 sync s3://bucket/AWSDynamoDB/<export-id> ./export).
+# Each data/*.json.gz file holds one {"Item": {...}} object per line.
+#
+# Reading an export costs no read capacity, so the backfills can work out
+# their updates from one and only send the writes to the live table.
+
+_deserializer = None
+
+
+def export_files(path):
+    """The data files of an export, given the export directory, its data/
+    directory, or a single .json.gz file."""
+    if os.path.isfile(path):
+        return [path]
+    for pattern in ('data/*.json.gz', '*.json.gz', '**/data/*.json.gz'):
+        files = sorted(glob.glob(os.path.join(path, pattern), recursive=True))
+        if files:
+            return files
+    raise FileNotFoundError(f"No DynamoDB export data files under {path}")
+
+
+def decode_line(line):
+    # Same types boto3's Table resource returns (numbers as Decimal, sets as set)
+    global _deserializer
+    if _deserializer is None:
+        from boto3.dynamodb.types import TypeDeserializer # type: ignore
+        _deserializer = TypeDeserializer()
+    image = json.loads(line)['Item']
+    return {name: _deserializer.deserialize(value) for name, value in image.items()}
+
+
+def read_export_file(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield decode_line(line)
+
+
+def iter_export_items(path):
+    for file_path in export_files(path):
+        yield from read_export_file(file_path)
+
+
+def _is_blank(name, item):
+    return item.get(name, '') == ''
+
+
+def blank_attribute(name):
+    """Filter for items where `name` is missing or empty. Picklable, so it can
+    run in the decode workers."""
+    return functools.partial(_is_blank, name)
+
+
+def _decode_file(path, attributes=None, keep=None):
+    items = []
+    for item in read_export_file(path):
+        if keep and not keep(item):
+            continue
+        items.append({name: item[name] for name in attributes if name in item} if attributes else item)
+    return items
+
+
+def iter_export_files(path, workers=None, keep=None, attributes=None, skip_files=()):
+    """Decode an export's data files in a process pool.
+
+    Yields (file_number, items) as each file finishes, with items filtered by
+    keep(item) and cut down to `attributes` inside the workers so only what the
+    caller needs crosses back. File numbers follow the sorted file list, so
+    they're stable across runs and can be checkpointed like scan segments;
+    skip_files lists ones to leave out. At most two files per worker are in
+    flight, which bounds memory on large exports.
+    """
+    skip_files = set(skip_files)
+    files = [(number, file_path) for number, file_path in enumerate(export_files(path)) if number not in skip_files]
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = 2 * workers
+        pending = {}
+        queued = iter(files)
+        while True:
+            for number, file_path in queued:
+                pending[pool.submit(_decode_file, file_path, attributes, keep)] = number
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number = pending.pop(future)
+                items = future.result()
+                registry.incr('snapshot.files')
+                registry.incr('snapshot.items', len(items))
+                yield number, items
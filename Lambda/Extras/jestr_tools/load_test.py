@@ -0,0 +1,310 @@
+import argparse
+import json
+import logging
+import os
+import random
+import time
+
+from botocore.exceptions import ClientError # type: ignore
+
+from . import aws
+from .metrics import registry
+from .synthetic_memes import SyntheticMemes
+from .write_pipeline import BatchWriter
+
+# Throughput benchmark for the backfill scripts. Runs them against a local
+# stand-in for the Memes table: moto in-process by default, or DynamoDB Local
+# (start it with -dbPath for a file-backed table) via --endpoint-url.
+#
+#   python -m jestr_tools load-test --memes 20000
+#   python -m jestr_tools load-test --endpoint-url http://localhost:8000 --memes 200000 --skip-tagger
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('load_test')
+
+# Not 'Memes': the benchmarks hand this table to the scripts directly, and a
+# distinct name means a misrouted request can never touch the real table
+TABLE_NAME = 'MemesLoadTest'
+BUCKET = 'jestr-meme-uploads'
+# Wrapper-side timings, kept apart from the scripts' own dynamodb.* timers
+LATENCY_PREFIX = 'loadtest.'
+
+
+class TimedCalls:
+    """Wraps a boto3 table or client, timing the listed operations into the
+    metrics registry as loadtest.<operation>.
+
+    With a throttle_rate, that fraction of calls fails with
+    ProvisionedThroughputExceededException before reaching the table, which
+    exercises the retry paths the way a busy production table would.
+    """
+
+    def __init__(self, target, operations, throttle_rate=0.0):
+        self._target = target
+        self._operations = operations
+        self._throttle_rate = throttle_rate
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in self._operations:
+            return attr
+
+        def timed(*args, **kwargs):
+            if self._throttle_rate and random.random() < self._throttle_rate:
+                registry.incr('loadtest.injected_throttles')
+                raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException',
+                                             'Message': 'Injected by load_test'}}, name)
+            with registry.timer(LATENCY_PREFIX + name):
+                return attr(*args, **kwargs)
+        return timed
+
+
+class TimedTable(TimedCalls):
+    def __init__(self, table, throttle_rate=0.0):
+        super().__init__(table, ('scan', 'update_item', 'put_item'), throttle_rate)
+        client = TimedCalls(table.meta.client, ('batch_write_item',), throttle_rate)
+        self.meta = type('Meta', (), {'client': client})()
+
+
+def start_local_aws(endpoint_url=None):
+    """Returns a stop() callable. Without an endpoint, all boto3 calls in this
+    process go to moto until stop() is called. With one, placeholder
+    credentials replace any real ones, so nothing can reach AWS; the endpoint
+    itself is passed to local_dynamodb()."""
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-2')
+    if endpoint_url:
+        os.environ['AWS_ACCESS_KEY_ID'] = 'local'
+        os.environ['AWS_SECRET_ACCESS_KEY'] = 'local'
+        os.environ.pop('AWS_SESSION_TOKEN', None)
+        os.environ.pop('AWS_PROFILE', None)
+        aws.reset()
+        return lambda: None
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ[name] = 'testing'
+    try:
+        from moto import mock_aws # type: ignore
+        mock = mock_aws()
+    except ImportError:
+        # moto < 5 has one decorator per service
+        from moto import mock_dynamodb, mock_s3 # type: ignore
+        mocks = [mock_dynamodb(), mock_s3()]
+        for m in mocks:
+            m.start()
+        aws.reset()
+        return lambda: [m.stop() for m in mocks]
+    mock.start()
+    # Clients made before the environment changed would still point at AWS
+    aws.reset()
+    return mock.stop
+
+
+def local_dynamodb(endpoint_url=None):
+    # The endpoint goes straight to the resource rather than through
+    # AWS_ENDPOINT_URL_*, which ignore_configured_endpoint_urls would bypass
+    if endpoint_url:
+        return aws.session().resource('dynamodb', endpoint_url=endpoint_url, config=aws.client_config())
+    return aws.resource('dynamodb')
+
+
+def create_memes_table(dynamodb, name=TABLE_NAME, recreate=False):
+    existing = dynamodb.meta.client.list_tables()['TableNames']
+    if name in existing:
+        if not recreate:
+            raise RuntimeError(f"Table {name} already exists; pass --recreate to delete it and start over")
+        dynamodb.Table(name).delete()
+        dynamodb.meta.client.get_waiter('table_not_exists').wait(TableName=name)
+    table = dynamodb.create_table(
+        TableName=name,
+        KeySchema=[{'AttributeName': 'MemeID', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'MemeID', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    table.wait_until_exists()
+    return table
+
+
+def seed_memes(table, count, blank_fraction, seed=None):
+    # Items shaped like what process_memes.update_meme() writes; a blank_fraction
+    # of them get an empty Email so update_memes has work to do
+    from .process_memes import PROFILE_PIC_URL
+
+    synthetic = SyntheticMemes(seed)
+    rng = random.Random(seed)
+    blank_count = 0
+    chunk = 5000
+    with BatchWriter(table) as writer:
+        for start in range(0, count, chunk):
+            n = min(chunk, count - start)
+            columns = synthetic.engagement(n)
+            for i in range(n):
+                blank = rng.random() < blank_fraction
+                blank_count += blank
+                writer.put({
+                    'MemeID': f"Memes/loadtest-{start + i:08d}.jpg",
+                    'Caption': columns['Caption'][i],
+                    'CommentCount': 0,
+                    'DownloadCount': columns['DownloadCount'][i],
+                    'Email': '' if blank else 'loadtest@jestr.app',
+                    'LikeCount': columns['LikeCount'][i],
+                    'ProfilePicUrl': PROFILE_PIC_URL,
+                    'ShareCount': columns['ShareCount'][i],
+                    'Status': 'active',
+                    'UploadTimestamp': columns['UploadTimestamp'][i],
+                    'Username': 'Anon'
+                })
+    return blank_count
+
+
+class StubRekognition:
+    """Answers detect_labels/detect_text after a fixed delay, standing in for the real API."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def detect_labels(self, **kwargs):
+        time.sleep(self.latency)
+        return {'Labels': [{'Name': 'Meme'}, {'Name': 'Text'}]}
+
+    def detect_text(self, **kwargs):
+        time.sleep(self.latency)
+        return {'TextDetections': [{'DetectedText': 'LOAD TEST', 'Type': 'LINE'}]}
+
+
+class StubS3:
+    def __init__(self, count):
+        self.count = count
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix, StartAfter=None):
+        keys = [f"Memes/loadtest-{i:08d}.jpg" for i in range(self.count)]
+        keys = [k for k in keys if not StartAfter or k > StartAfter]
+        for i in range(0, len(keys), 1000):
+            yield {'Contents': [{'Key': k, 'ETag': f'"{k}"'} for k in keys[i:i + 1000]]}
+
+
+def run_benchmark(name, func, items):
+    registry.reset()
+    start = time.perf_counter()
+    stats = func() or {}
+    elapsed = time.perf_counter() - start
+    summary = registry.summary()
+    return {
+        'benchmark': name,
+        'items': items,
+        'seconds': round(elapsed, 3),
+        'items_per_sec': round(items / elapsed, 1) if elapsed else None,
+        'retries': stats.get('retries', 0),
+        'throttles': stats.get('throttles', 0) + summary['counters'].get('scan.throttles', 0),
+        'failed': stats.get('failed', 0),
+        'skipped': stats.get('skipped', 0),
+        'consumed_wcu': round(stats.get('consumed_wcu', 0.0), 1),
+        'injected_throttles': summary['counters'].get('loadtest.injected_throttles', 0),
+        'latency': {name[len(LATENCY_PREFIX):]: latency for name, latency in summary['latency'].items()
+                    if name.startswith(LATENCY_PREFIX)},
+    }
+
+
+def bench_update_memes(table, args, blank_count):
+    from . import process_memes
+    process_memes.table = table
+    return run_benchmark('update_memes', lambda: process_memes.update_memes(
+        total_segments=args.segments, max_workers=args.workers, write_workers=args.write_workers,
+        max_wcu=args.max_wcu, seed=args.seed, confirm=False, diff=args.diff
+    ), blank_count)
+
+
+def bench_update_meme_captions(table, args):
+    from . import update_meme_captions
+    update_meme_captions.table = table
+    return run_benchmark('update_meme_captions', lambda: update_meme_captions.update_meme_captions(
+        total_segments=args.segments, max_workers=args.workers, write_workers=args.write_workers, max_wcu=args.max_wcu,
+        diff=args.diff
+    ), args.memes)
+
+
+def bench_tagger(table, args):
+    from . import meme_tagger
+
+    s3 = aws.client('s3')
+    if args.endpoint_url:
+        # DynamoDB Local has no S3, so list from a stub bucket instead
+        s3 = StubS3(args.images)
+    else:
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={'LocationConstraint': os.environ['AWS_DEFAULT_REGION']})
+        for i in range(args.images):
+            s3.put_object(Bucket=BUCKET, Key=f"Memes/loadtest-{i:08d}.jpg", Body=b'\xff\xd8\xff')
+
+    writer = BatchWriter(table)
+    pipeline = meme_tagger.TaggingPipeline(
+        s3, StubRekognition(args.rekognition_latency), writer, bucket=BUCKET,
+        workers=args.tagger_workers, rekognition_tps=args.tps
+    )
+
+    def run():
+        pipeline.run()
+        return writer.stats.as_dict()
+    return run_benchmark('meme_tagger', run, args.images)
+
+
+def print_report(results):
+    for result in results:
+        print(f"\n{result['benchmark']}: {result['items']} items in {result['seconds']}s "
+              f"({result['items_per_sec']} items/sec)")
+        print(f"  retries: {result['retries']}  throttles: {result['throttles']}  failed: {result['failed']}  "
+              f"skipped: {result['skipped']}  consumed WCU: {result['consumed_wcu']}")
+        for op, latency in sorted(result['latency'].items()):
+            print(f"  {op:<18} {latency['count']:>8} requests  p50 {latency['p50_ms']:>8} ms  p99 {latency['p99_ms']:>8} ms")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the Memes backfill scripts against a local table")
+    parser.add_argument('--endpoint-url', help="DynamoDB Local endpoint; defaults to an in-process moto table")
+    parser.add_argument('--table', default=TABLE_NAME, help="Table to seed and benchmark against")
+    parser.add_argument('--recreate', action='store_true', help="Delete and recreate the table if it already exists")
+    parser.add_argument('--memes', type=int, default=10000, help="Synthetic memes to seed")
+    parser.add_argument('--blank-fraction', type=float, default=0.5, help="Fraction seeded with a blank Email")
+    parser.add_argument('--seed', type=int, default=1337, help="Seed for the synthetic data")
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--write-workers', type=int, default=16)
+    parser.add_argument('--max-wcu', type=float, default=None)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of table calls to fail as throttled")
+    parser.add_argument('--images', type=int, default=1000, help="Images for the tagger benchmark")
+    parser.add_argument('--tagger-workers', type=int, default=8)
+    parser.add_argument('--tps', type=float, default=None, help="Rekognition TPS cap for the tagger")
+    parser.add_argument('--rekognition-latency', type=float, default=0.02, help="Stub Rekognition delay in seconds")
+    parser.add_argument('--diff', action='store_true', help="Run the backfills in --diff mode")
+    parser.add_argument('--skip-tagger', action='store_true')
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    stop = start_local_aws(args.endpoint_url)
+    try:
+        dynamodb = local_dynamodb(args.endpoint_url)
+        table = create_memes_table(dynamodb, args.table, recreate=args.recreate)
+
+        start = time.perf_counter()
+        blank_count = seed_memes(table, args.memes, args.blank_fraction, args.seed)
+        logger.warning(f"Seeded {args.memes} memes in {time.perf_counter() - start:.1f}s")
+
+        timed = TimedTable(table, args.throttle_rate)
+        results = [
+            bench_update_memes(timed, args, blank_count),
+            bench_update_meme_captions(timed, args),
+        ]
+        if not args.skip_tagger:
+            results.append(bench_tagger(timed, args))
+    finally:
+        stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+
+from . import EXTRAS_DIR, metrics
+from .metrics import registry
+
+# Offline keyword/tag index over the Tags and DetectedText that meme_tagger.py
+# writes onto each Memes item. The index is a single file that's read through
+# mmap, so a lookup is a binary search over the term table plus one posting
+# list decode; nothing is loaded up front.
+#
+#   python -m jestr_tools search-index build                   # scan the Memes table
+#   python -m jestr_tools search-index build --export ./export # or a DynamoDB export
+#   python -m jestr_tools search-index query tag:cat funny
+#
+# File layout (little-endian):
+#   header
+#   term table   (n_terms + 1) x <term offset, postings offset, doc count>
+#   term blob    UTF-8 terms, sorted bytewise
+#   postings     per term, doc numbers as varint deltas
+#   doc table    (n_docs + 1) x <MemeID offset>
+#   doc blob     UTF-8 MemeIDs, sorted; a doc number is a position here
+#   fingerprints n_docs x 64-bit hash of the doc's Tags + DetectedText
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.path.join(EXTRAS_DIR, '.meme_search.idx')
+MAGIC = b'JSTRIDX1'
+HEADER = struct.Struct('<8sIIId6Q')
+TERM_ENTRY = struct.Struct('<QQI')
+OFFSET = struct.Struct('<Q')
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+TAG_PREFIX = 'tag:'
+# build_item() pads Tags out to five with this
+PLACEHOLDER_TAG = 'unclassified'
+
+
+def words(text):
+    # One-character words ("t" from "can't") are too common to be worth a
+    # posting list, so neither the index nor a query keeps them
+    return [word for word in TOKEN_RE.findall(str(text or '').lower()) if len(word) > 1]
+
+
+def tokenize(tags, text):
+    """Terms for one meme: each tag whole as tag:<tag>, plus the words of the
+    tags and the detected text."""
+    terms = set()
+    for tag in tags or ():
+        tag = str(tag).strip().lower()
+        if tag and tag != PLACEHOLDER_TAG:
+            terms.add(TAG_PREFIX + tag)
+            terms.update(words(tag))
+    terms.update(words(text))
+    return terms
+
+
+def query_terms(query):
+    terms = []
+    for part in query:
+        part = part.strip().lower()
+        if part.startswith(TAG_PREFIX):
+            terms.append(part)
+        else:
+            terms.extend(words(part))
+    return terms
+
+
+def fingerprint(tags, text):
+    data = json.dumps([sorted(str(tag) for tag in tags or ()), str(text or '')]).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def encode_postings(doc_numbers):
+    out = bytearray()
+    previous = 0
+    for number in doc_numbers:
+        delta = number - previous
+        previous = number
+        while delta >= 0x80:
+            out.append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return out
+
+
+def decode_postings(buffer, start, end):
+    numbers = []
+    previous = 0
+    value = shift = 0
+    for position in range(start, end):
+        byte = buffer[position]
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        numbers.append(previous)
+        value = shift = 0
+    return numbers
+
+
+def write_index(path, docs, built_at=None):
+    """Write docs (MemeID -> (fingerprint, terms)) as an index file. The new
+    file is swapped in atomically, so open readers keep the old one."""
+    meme_ids = sorted(docs)
+    postings = {}
+    for number, meme_id in enumerate(meme_ids):
+        for term in docs[meme_id][1]:
+            postings.setdefault(term.encode('utf-8'), []).append(number)
+    terms = sorted(postings)
+
+    term_table = bytearray()
+    term_blob = bytearray()
+    posting_blob = bytearray()
+    for term in terms:
+        term_table += TERM_ENTRY.pack(len(term_blob), len(posting_blob), len(postings[term]))
+        term_blob += term
+        posting_blob += encode_postings(postings[term])
+    term_table += TERM_ENTRY.pack(len(term_blob), len(posting_blob), 0)
+
+    doc_table = bytearray()
+    doc_blob = bytearray()
+    for meme_id in meme_ids:
+        doc_table += OFFSET.pack(len(doc_blob))
+        doc_blob += meme_id.encode('utf-8')
+    doc_table += OFFSET.pack(len(doc_blob))
+    fingerprints = b''.join(OFFSET.pack(docs[meme_id][0]) for meme_id in meme_ids)
+
+    sections = [term_table, term_blob, posting_blob, doc_table, doc_blob, fingerprints]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(meme_ids), len(terms), 0, built_at or time.time(), *offsets))
+        for section in sections:
+            f.write(section)
+    os.replace(tmp_path, path)
+    return len(meme_ids), len(terms)
+
+
+class SearchIndex:
+    """Read-only view of an index file. Opening it maps the file and reads the
+    header; everything else is paged in by the OS as lookups touch it."""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.doc_count, self.term_count, _, self.built_at, self._terms_at, self._term_blob_at,
+         self._postings_at, self._docs_at, self._doc_blob_at, self._fingerprints_at) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a meme search index")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _term_entry(self, number):
+        return TERM_ENTRY.unpack_from(self._map, self._terms_at + number * TERM_ENTRY.size)
+
+    def term(self, number):
+        start = self._term_entry(number)[0]
+        end = self._term_entry(number + 1)[0]
+        return self._map[self._term_blob_at + start:self._term_blob_at + end]
+
+    def _find(self, term):
+        term = term.encode('utf-8')
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < term:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.term_count and self.term(low) == term else None
+
+    def _postings(self, number):
+        start = self._term_entry(number)[1]
+        end = self._term_entry(number + 1)[1]
+        return decode_postings(self._map, self._postings_at + start, self._postings_at + end)
+
+    def postings(self, term):
+        number = self._find(term)
+        return [] if number is None else self._postings(number)
+
+    def doc_frequency(self, term):
+        number = self._find(term)
+        return 0 if number is None else self._term_entry(number)[2]
+
+    def meme_id(self, number):
+        start = OFFSET.unpack_from(self._map, self._docs_at + number * OFFSET.size)[0]
+        end = OFFSET.unpack_from(self._map, self._docs_at + (number + 1) * OFFSET.size)[0]
+        return self._map[self._doc_blob_at + start:self._doc_blob_at + end].decode('utf-8')
+
+    def search(self, query, limit=None):
+        """MemeIDs containing every term in the query, in MemeID order."""
+        terms = query_terms(query if isinstance(query, (list, tuple)) else [query])
+        if not terms:
+            return []
+        # Intersect starting from the rarest term, so the candidate set only shrinks
+        terms.sort(key=self.doc_frequency)
+        matches = None
+        for term in terms:
+            numbers = self.postings(term)
+            matches = set(numbers) if matches is None else matches.intersection(numbers)
+            if not matches:
+                return []
+        numbers = sorted(matches)[:limit] if limit else sorted(matches)
+        return [self.meme_id(number) for number in numbers]
+
+    def documents(self):
+        """Yields (MemeID, fingerprint) for every doc."""
+        for number in range(self.doc_count):
+            yield self.meme_id(number), OFFSET.unpack_from(self._map, self._fingerprints_at + number * OFFSET.size)[0]
+
+    def terms_by_doc(self):
+        """MemeID -> set of terms, rebuilt from the posting lists."""
+        by_number = {}
+        for number in range(self.term_count):
+            term = self.term(number).decode('utf-8')
+            for doc in self._postings(number):
+                by_number.setdefault(doc, set()).add(term)
+        return {self.meme_id(number): terms for number, terms in by_number.items()}
+
+
+class IndexBuilder:
+    """Collects docs for a rebuild. Given the previous index, memes whose
+    Tags/DetectedText fingerprint hasn't changed keep their old terms, so only
+    new or changed memes are tokenized. Memes no longer in the source drop out.
+    add_items() is safe to call from the scan worker threads."""
+
+    def __init__(self, previous=None):
+        self.previous = dict(previous.documents()) if previous else {}
+        self._previous_index = previous
+        self.docs = {}
+        self.reused = []
+        self.counts = {'items': 0, 'indexed': 0, 'unchanged': 0, 'changed': 0, 'new': 0, 'empty': 0}
+        self._lock = threading.Lock()
+
+    def add_items(self, items):
+        docs = {}
+        reused = []
+        counts = dict.fromkeys(self.counts, 0)
+        for item in items:
+            counts['items'] += 1
+            meme_id = item['MemeID']
+            tags, text = item.get('Tags'), item.get('DetectedText')
+            if not tags and not text:
+                counts['empty'] += 1
+                continue
+            value = fingerprint(tags, text)
+            previous = self.previous.get(meme_id)
+            if previous == value:
+                reused.append((meme_id, value))
+                counts['unchanged'] += 1
+                continue
+            counts['changed' if previous is not None else 'new'] += 1
+            terms = tokenize(tags, text)
+            if terms:
+                docs[meme_id] = (value, terms)
+        registry.incr('index.items', counts['items'])
+        with self._lock:
+            self.docs.update(docs)
+            self.reused.extend(reused)
+            for name, count in counts.items():
+                self.counts[name] += count
+
+    def finish(self):
+        if self.reused:
+            old_terms = self._previous_index.terms_by_doc()
+            for meme_id, value in self.reused:
+                self.docs[meme_id] = (value, old_terms.get(meme_id, set()))
+        self.counts['indexed'] = len(self.docs)
+        return self.docs
+
+
+def build_from_table(builder, total_segments, max_workers):
+    # Imported here so `query` doesn't pay for boto3
+    from .aws import resource
+    from .scan_engine import parallel_scan
+
+    table = resource('dynamodb').Table('Memes')
+    scan_kwargs = {
+        'ProjectionExpression': 'MemeID, Tags, DetectedText',
+    }
+    parallel_scan(table, lambda segment, items: builder.add_items(items),
+                  total_segments=total_segments, max_workers=max_workers, scan_kwargs=scan_kwargs)
+
+
+def build_from_export(builder, export_path, workers=None):
+    from .export_reader import iter_export_files
+
+    for _, items in iter_export_files(export_path, workers=workers, attributes=('MemeID', 'Tags', 'DetectedText')):
+        builder.add_items(items)
+
+
+def build(path, export_path=None, full=False, total_segments=8, max_workers=8):
+    previous = None
+    if not full and os.path.exists(path):
+        try:
+            previous = SearchIndex(path)
+        except ValueError as e:
+            logger.warning(f"Ignoring the existing index: {e}")
+    try:
+        builder = IndexBuilder(previous)
+        if export_path:
+            build_from_export(builder, export_path)
+        else:
+            build_from_table(builder, total_segments, max_workers)
+        docs = builder.finish()
+    finally:
+        if previous:
+            previous.close()
+    doc_count, term_count = write_index(path, docs)
+    logger.info(f"Wrote {path}: {doc_count} memes, {term_count} terms, {os.path.getsize(path)} bytes")
+    return builder.counts
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build and query the offline meme tag/text index")
+    parser.add_argument('--index', default=INDEX_PATH, help="Index file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Build or incrementally refresh the index")
+    build_parser.add_argument('--export', help="Read a local DynamoDB export instead of scanning the table")
+    build_parser.add_argument('--full', action='store_true', help="Re-tokenize every meme, ignoring the existing index")
+    build_parser.add_argument('--segments', type=int, default=8, help="Parallel scan segments")
+    build_parser.add_argument('--workers', type=int, default=8, help="Scan worker threads")
+    metrics.add_arguments(build_parser)
+
+    query_parser = commands.add_parser('query', help="MemeIDs matching every term (tag:<tag> matches a whole tag)")
+    query_parser.add_argument('terms', nargs='+')
+    query_parser.add_argument('--limit', type=int, default=50)
+
+    commands.add_parser('stats', help="Show index size and age")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        with metrics.reporting(args, item_counter='index.items'):
+            counts = build(args.index, args.export, args.full, args.segments, args.workers)
+        logger.info(', '.join(f"{count} {label}" for label, count in counts.items()))
+        return
+
+    if not os.path.exists(args.index):
+        sys.exit(f"No index at {args.index}; run the build command first")
+    with SearchIndex(args.index) as index:
+        if args.command == 'query':
+            start = time.perf_counter()
+            results = index.search(args.terms, args.limit)
+            elapsed = time.perf_counter() - start
+            for meme_id in results:
+                print(meme_id)
+            print(f"{len(results)} results in {elapsed * 1e6:.0f} µs", file=sys.stderr)
+        else:
+            built = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(index.built_at))
+            print(f"{index.doc_count} memes, {index.term_count} terms, {os.path.getsize(args.index)} bytes, built {built}")
+
+
+if __name__ == "__main__":
+    main()
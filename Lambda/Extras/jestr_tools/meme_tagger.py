@@ -0,0 +1,396 @@
+import argparse
+import functools
+import logging
+import queue
+import threading
+import time
+
+from . import metrics
+from .aws import LazyClient, resource
+from .write_pipeline import BatchWriter, CapacityLimiter, backoff_delay, error_code, is_throttle_error, MAX_RETRIES
+from .analysis_cache import AnalysisCache, CACHE_PATH, DEFAULT_MAX_BYTES
+from .phash_index import PerceptualIndex, INDEX_PATH, DEFAULT_DISTANCE, hamming
+from .metrics import registry
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Created on first use, from the shared session in aws.py
+s3 = LazyClient('s3')
+rekognition = LazyClient('rekognition')
+
+# Constants
+S3_BUCKET = 'jestr-meme-uploads'
+S3_FOLDER = 'Memes'
+DYNAMO_TABLE = 'Memes'
+MAX_LABELS = 5
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+# Pipeline tuning. Rekognition's default quota for DetectLabels/DetectText is
+# a few TPS per API, so the limiter is what actually bounds a run.
+DEFAULT_WORKERS = 4
+DEFAULT_REKOGNITION_TPS = 10
+QUEUE_SIZE = 100
+DEFAULT_LISTERS = 1
+# Shard boundaries are picked from these, in S3's (UTF-8 binary) key order
+SHARD_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# Marks the end of a stage's input
+_DONE = object()
+
+def call_rekognition(limiter, func, **kwargs):
+    # Wait for a token, and back off and retry if Rekognition throttles us anyway
+    api = getattr(func, '__name__', 'call')
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire()
+        try:
+            registry.incr('rekognition.calls')
+            with registry.timer(f'rekognition.{api}'):
+                return func(**kwargs)
+        except Exception as e:
+            if not is_throttle_error(e) or attempt >= MAX_RETRIES:
+                registry.incr('rekognition.errors')
+                raise
+            registry.incr('rekognition.throttles')
+            registry.incr('rekognition.retries')
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+def detect_labels(bucket, key, client=None, limiter=None, strict=False):
+    logger.debug(f"Detecting labels for image: {key}")
+    try:
+        response = call_rekognition(
+            limiter,
+            (client or rekognition).detect_labels,
+            Image={'S3Object': {'Bucket': bucket, 'Name': key}},
+            MaxLabels=MAX_LABELS,
+            MinConfidence=70
+        )
+        return [label['Name'] for label in response['Labels']]
+    except Exception as e:
+        # Only AWS errors are logged and defaulted; anything else is a bug
+        if strict or error_code(e) is None:
+            raise
+        logger.error(f"Error detecting labels: {e}")
+        return []
+
+def detect_text(bucket, key, client=None, limiter=None, strict=False):
+    logger.debug(f"Detecting text for image: {key}")
+    try:
+        response = call_rekognition(
+            limiter,
+            (client or rekognition).detect_text,
+            Image={'S3Object': {'Bucket': bucket, 'Name': key}}
+        )
+        detected_text = ' '.join([text['DetectedText'] for text in response['TextDetections'] if text['Type'] == 'LINE'])
+        return detected_text[:100] if detected_text else ""
+    except Exception as e:
+        # Only AWS errors are logged and defaulted; anything else is a bug
+        if strict or error_code(e) is None:
+            raise
+        logger.error(f"Error detecting text: {e}")
+        return ""
+
+def build_item(key, tags, text):
+    # Ensure we have exactly 5 tags
+    tags = tags[:MAX_LABELS]
+    while len(tags) < MAX_LABELS:
+        tags.append("Unclassified")
+
+    # Create the item for DynamoDB
+    return {
+        'MemeID': key,
+        'Tags': tags,
+        'DetectedText': text
+    }
+
+def update_dynamo_item(writer, item, on_written=None):
+    logger.debug(f"Queueing DynamoDB item for image: {item['MemeID']}")
+    writer.put(item, on_written)
+
+def list_images(s3_client, bucket, prefix, start_after=None, end_before=None):
+    # Yields (key, etag) page by page, so work can start on the first page
+    # while S3 is still listing the rest. S3 returns ETags wrapped in quotes.
+    kwargs = {'Bucket': bucket, 'Prefix': prefix}
+    if start_after:
+        kwargs['StartAfter'] = start_after
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**kwargs):
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            if end_before and key >= end_before:
+                return
+            if key.lower().endswith(IMAGE_EXTENSIONS):
+                yield key, obj.get('ETag', '').strip('"')
+
+def shard_ranges(prefix, shards):
+    """Split a prefix into contiguous (start_after, end_before) key ranges.
+
+    Boundaries are prefix + a character from SHARD_CHARS, so with the first
+    range open at the start and the last open at the end, every key under the
+    prefix falls in exactly one shard no matter what characters it uses.
+    """
+    shards = max(1, min(shards, len(SHARD_CHARS)))
+    if shards == 1:
+        return [(None, None)]
+    base = prefix if prefix.endswith('/') else prefix + '/'
+    step = len(SHARD_CHARS) / shards
+    boundaries = [base + SHARD_CHARS[int(i * step)] for i in range(1, shards)]
+    # StartAfter is exclusive, which only drops a key equal to the bare
+    # boundary itself; that can't be an image since it has no extension
+    return list(zip([None] + boundaries, boundaries + [None]))
+
+class TaggingPipeline:
+    """Tags images through four stages joined by bounded queues:
+
+        list -> detect_labels ┐
+             -> detect_text   ┴-> join + DynamoDB write
+
+    Every listed key is handed to both detection stages, so the two
+    Rekognition calls for an image run at the same time on different workers.
+    One token bucket shared by both stages keeps the combined call rate under
+    rekognition_tps. Clients are passed in so the pipeline can run against
+    stubbed boto3 clients.
+
+    With a cache, images whose ETag was analyzed before go straight from the
+    list stage to the write stage. In incremental mode, keys already written
+    with their current ETag are skipped altogether. With listers > 1 the
+    prefix is split into key ranges that are listed in parallel.
+
+    With clusters (key -> cluster id, from a perceptual-hash index) and the
+    index's hashes, only the first listed member of each near-duplicate
+    cluster is analyzed. Members within max_distance of that member get a copy
+    of its Tags and DetectedText; any further away are analyzed themselves.
+    """
+
+    def __init__(self, s3_client, rekognition_client, writer, bucket=S3_BUCKET, prefix=S3_FOLDER,
+                 workers=DEFAULT_WORKERS, rekognition_tps=DEFAULT_REKOGNITION_TPS, queue_size=QUEUE_SIZE,
+                 cache=None, incremental=False, listers=DEFAULT_LISTERS, clusters=None, hashes=None,
+                 max_distance=DEFAULT_DISTANCE):
+        self.s3_client = s3_client
+        self.rekognition_client = rekognition_client
+        self.writer = writer
+        self.bucket = bucket
+        self.prefix = prefix
+        self.workers = max(1, workers)
+        self.shards = shard_ranges(prefix, listers)
+        self.limiter = CapacityLimiter(rekognition_tps) if rekognition_tps else None
+        self.label_queue = queue.Queue(maxsize=queue_size)
+        self.text_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+        self.cache = cache
+        self.incremental = incremental and cache is not None
+        self.listed = 0
+        self.tagged = 0
+        self.skipped = 0
+        self.copied = 0
+        self.clusters = clusters or {}
+        self.hashes = hashes or {}
+        self.max_distance = max_distance
+        self._cluster_leaders = {}
+        self._cluster_results = {}
+        self._cluster_followers = {}
+        self._cluster_lock = threading.Lock()
+        self._list_lock = threading.Lock()
+        self._listers_running = len(self.shards)
+
+    def _list_stage(self, start_after, end_before):
+        try:
+            for key, etag in list_images(self.s3_client, self.bucket, self.prefix, start_after, end_before):
+                with self._list_lock:
+                    self.listed += 1
+                registry.incr('tagger.listed')
+                if self.cache and etag:
+                    if self.incremental and self.cache.is_current(key, etag):
+                        with self._list_lock:
+                            self.skipped += 1
+                        registry.incr('tagger.skipped')
+                        continue
+                    cached = self.cache.get(etag)
+                    if cached:
+                        registry.incr('tagger.cache_hits')
+                        self.result_queue.put(('cached', (key, etag), cached, True))
+                        continue
+                if self._follow_cluster(key, etag):
+                    continue
+                self.label_queue.put((key, etag))
+                self.text_queue.put((key, etag))
+        except Exception as e:
+            logger.error(f"Error listing s3://{self.bucket}/{self.prefix} from {start_after or 'start'}: {e}")
+        finally:
+            # The last lister to finish tells the detection stages there's no more input
+            with self._list_lock:
+                self._listers_running -= 1
+                if self._listers_running:
+                    return
+            for _ in range(self.workers):
+                self.label_queue.put(_DONE)
+                self.text_queue.put(_DONE)
+
+    def _near(self, key, other):
+        # Copies are only made between images whose hashes are actually close
+        if key not in self.hashes or other not in self.hashes:
+            return False
+        return hamming(self.hashes[key], self.hashes[other]) <= self.max_distance
+
+    def _is_leader(self, key):
+        return key in self.clusters and self._cluster_leaders.get(self.clusters[key]) == key
+
+    def _follow_cluster(self, key, etag):
+        # True if another member of the key's cluster is (or was) analyzed instead
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            return False
+        with self._cluster_lock:
+            leader = self._cluster_leaders.get(cluster)
+            if leader is None:
+                # First member listed: it goes through detection for the cluster
+                self._cluster_leaders[cluster] = key
+                self._cluster_followers[cluster] = []
+                return False
+            if not self._near(key, leader):
+                return False
+            result = self._cluster_results.get(cluster)
+            if result is None:
+                self._cluster_followers[cluster].append((key, etag))
+                return True
+        # Put outside the lock; the write stage takes it while the queue may be full
+        self.result_queue.put(('copied', (key, etag), result[0], result[1]))
+        return True
+
+    def _detect_stage(self, kind, in_queue, detect, default):
+        while True:
+            obj = in_queue.get()
+            if obj is _DONE:
+                self.result_queue.put(_DONE)
+                return
+            try:
+                result = detect(self.bucket, obj[0], client=self.rekognition_client, limiter=self.limiter, strict=True)
+                ok = True
+            except Exception as e:
+                logger.error(f"Error running {kind} detection for {obj[0]}: {e}")
+                result, ok = default, False
+            self.result_queue.put((kind, obj, result, ok))
+
+    def _write_stage(self):
+        # Both detection stages report here; an item is written once both halves arrive
+        partial = {}
+        running = 2 * self.workers
+        while running:
+            result = self.result_queue.get()
+            if result is _DONE:
+                running -= 1
+                continue
+            kind, obj, value, ok = result
+            key, etag = obj
+            if kind in ('cached', 'copied'):
+                tags, text = value
+            else:
+                halves = partial.setdefault(obj, {})
+                halves[kind] = (value, ok)
+                if len(halves) < 2:
+                    continue
+                del partial[obj]
+                (tags, labels_ok), (text, text_ok) = halves['labels'], halves['text']
+                # Only remember complete analyses, so a failed call is retried next run
+                if self.cache and etag and labels_ok and text_ok:
+                    self.cache.put(etag, tags, text)
+                ok = labels_ok and text_ok
+
+            self._write(key, etag, tags, text, ok, copied=kind == 'copied')
+            if kind in ('labels', 'text') and self._is_leader(key):
+                with self._cluster_lock:
+                    self._cluster_results[self.clusters[key]] = ((tags, text), ok)
+                    followers = self._cluster_followers.pop(self.clusters[key], [])
+                for follower, follower_etag in followers:
+                    self._write(follower, follower_etag, tags, text, ok, copied=True)
+        self.writer.flush()
+
+    def _write(self, key, etag, tags, text, ok, copied=False):
+        # Marked written only once the batch holding it has gone through, so an
+        # item that fails to write is retried by the next incremental run
+        on_written = None
+        if self.cache and etag and ok:
+            on_written = functools.partial(self.cache.mark_written, key, etag)
+        update_dynamo_item(self.writer, build_item(key, list(tags), text), on_written)
+        self.tagged += 1
+        registry.incr('tagger.tagged')
+        if copied:
+            self.copied += 1
+            registry.incr('tagger.copied')
+
+    def run(self):
+        threads = [threading.Thread(target=self._list_stage, name=f'list-{i}', args=shard)
+                   for i, shard in enumerate(self.shards)]
+        for i in range(self.workers):
+            threads.append(threading.Thread(target=self._detect_stage, name=f'labels-{i}',
+                                            args=('labels', self.label_queue, detect_labels, [])))
+            threads.append(threading.Thread(target=self._detect_stage, name=f'text-{i}',
+                                            args=('text', self.text_queue, detect_text, "")))
+        threads.append(threading.Thread(target=self._write_stage, name='write'))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.tagged
+
+def tag_memes(workers=DEFAULT_WORKERS, rekognition_tps=DEFAULT_REKOGNITION_TPS, cache_path=CACHE_PATH,
+              cache_max_bytes=DEFAULT_MAX_BYTES, incremental=False, listers=DEFAULT_LISTERS,
+              phash_index=None, phash_distance=DEFAULT_DISTANCE):
+    logger.info("Starting meme tagging process")
+
+    clusters = hashes = None
+    if phash_index:
+        # Build/refresh it first with: python -m jestr_tools phash build --source s3
+        index = PerceptualIndex(phash_index)
+        clusters = index.cluster_map(phash_distance)
+        hashes = {key: value for key, (_, value) in index.entries.items()}
+        logger.info(f"{len(clusters)} images are in near-duplicate clusters")
+
+    # Tagged items are buffered and written with BatchWriteItem, 25 at a time
+    writer = BatchWriter(resource('dynamodb').Table(DYNAMO_TABLE))
+    cache = AnalysisCache(cache_path, max_bytes=cache_max_bytes) if cache_path else None
+    pipeline = TaggingPipeline(s3, rekognition, writer, workers=workers, rekognition_tps=rekognition_tps,
+                               cache=cache, incremental=incremental, listers=listers, clusters=clusters,
+                               hashes=hashes, max_distance=phash_distance)
+    try:
+        tagged = pipeline.run()
+    finally:
+        if cache:
+            cache.close()
+
+    stats = writer.stats.as_dict()
+    logger.info(f"Tagged {tagged} of {pipeline.listed} images ({pipeline.skipped} unchanged and skipped)")
+    if clusters:
+        logger.info(f"Copied tags to {pipeline.copied} near-duplicates instead of analyzing them")
+    if cache:
+        logger.info(f"Analysis cache: {cache.hits} hits, {cache.misses} misses")
+    logger.info(f"DynamoDB writes: {stats['written']} written, {stats['failed']} failed, {stats['retries']} retries")
+    logger.info("All meme tagging completed")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Tag memes in S3 with Rekognition labels and text")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Workers per detection stage")
+    parser.add_argument('--listers', type=int, default=DEFAULT_LISTERS, help="Parallel S3 listers, each over a key range")
+    parser.add_argument('--tps', type=float, default=DEFAULT_REKOGNITION_TPS, help="Max Rekognition calls per second")
+    parser.add_argument('--cache', default=CACHE_PATH, help="SQLite file for cached Rekognition results")
+    parser.add_argument('--no-cache', action='store_true', help="Analyze every image, ignoring the cache")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024), help="Evict cached results beyond this size")
+    parser.add_argument('--incremental', action='store_true', help="Skip images already tagged with their current ETag")
+    parser.add_argument('--dedupe', nargs='?', const=INDEX_PATH, metavar='INDEX',
+                        help="Analyze one image per near-duplicate cluster from a phash index (python -m jestr_tools phash build)")
+    parser.add_argument('--dedupe-distance', type=int, default=DEFAULT_DISTANCE, help="Max Hamming distance for near-duplicates")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with metrics.reporting(args, item_counter='tagger.tagged'):
+        tag_memes(workers=args.workers, rekognition_tps=args.tps, cache_path=None if args.no_cache else args.cache,
+                  cache_max_bytes=int(args.cache_max_mb * 1024 * 1024), incremental=args.incremental,
+                  listers=args.listers, phash_index=args.dedupe, phash_distance=args.dedupe_distance)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import bisect
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 2.0
+
+# Histogram buckets: 10 per decade from 0.1 ms to ~100 s, so recording a
+# sample is a bisect plus an increment no matter how many samples there are
+BUCKET_BOUNDS = [10 ** (exp / 10) / 10000 for exp in range(0, 61)]
+
+
+class Histogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the requested rank
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(fraction * self.count))
+            seen = 0
+            for index, bucket_count in enumerate(self.buckets):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(BUCKET_BOUNDS[index], self.max) if index < len(BUCKET_BOUNDS) else self.max
+            return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p90_ms': round(self.percentile(0.90) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class Metrics:
+    """Counters and latency histograms shared by the maintenance scripts.
+
+    The scan engine, write pipeline and tagger all record into the module-level
+    `registry`, so a script gets rate, retry and latency numbers without
+    threading a metrics object through every call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.monotonic()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def get(self, name):
+        with self._lock:
+            return self.counters.get(name, 0)
+
+    def histogram(self, name):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            return histogram
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.monotonic()
+
+    def summary(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        return {
+            'elapsed_seconds': round(time.monotonic() - self.started, 3),
+            'counters': counters,
+            'latency': {name: histogram.summary() for name, histogram in sorted(histograms.items())},
+        }
+
+
+registry = Metrics()
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """Prints one progress line every `interval` seconds from a background
+    thread: items done, items/sec, ETA (when the total is known), consumed WCU,
+    retries and throttles. Rewrites the line in place on a terminal."""
+
+    def __init__(self, metrics=registry, item_counter='write.written', total=None, interval=PROGRESS_INTERVAL,
+                 stream=None):
+        self.metrics = metrics
+        self.item_counter = item_counter
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def line(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        done = self.metrics.get(self.item_counter)
+        rate = done / elapsed
+        parts = [f"{done:,} items", f"{rate:,.1f}/s"]
+        if self.total:
+            remaining = max(self.total - done, 0)
+            parts.append(f"ETA {format_duration(remaining / rate)}" if rate else "ETA --")
+        wcu = self.metrics.get('write.consumed_wcu')
+        if wcu:
+            parts.append(f"{wcu:,.0f} WCU ({wcu / elapsed:,.1f}/s)")
+        parts.append(f"retries {self.metrics.get('write.retries') + self.metrics.get('rekognition.retries')}")
+        throttles = sum(self.metrics.get(name) for name in ('scan.throttles', 'write.throttles', 'rekognition.throttles'))
+        parts.append(f"throttles {throttles}")
+        return ' | '.join(parts)
+
+    def _print(self, final=False):
+        if self._tty:
+            self.stream.write('\r' + self.line() + ('\n' if final else ''))
+        else:
+            self.stream.write(self.line() + '\n')
+        self.stream.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # Stay quiet until work starts, e.g. while a script waits on a prompt
+            if self.metrics.get(self.item_counter) or self.metrics.get('scan.pages'):
+                self._print()
+
+    def start(self):
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='progress', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._print(final=True)
+
+
+def add_arguments(parser):
+    parser.add_argument('--verbose', action='store_true', help="Log every item (debug output)")
+    parser.add_argument('--no-progress', action='store_true', help="Don't print the live progress line")
+    parser.add_argument('--metrics-json', metavar='PATH', default='-',
+                        help="Where to write the JSON metrics summary at exit ('-' for stdout, '' to skip)")
+
+
+def configure_logging(args):
+    if getattr(args, 'verbose', False):
+        logging.getLogger().setLevel(logging.DEBUG)
+        # botocore is far too chatty at DEBUG to be useful here
+        for name in ('botocore', 'boto3', 'urllib3', 's3transfer'):
+            logging.getLogger(name).setLevel(logging.INFO)
+
+
+def write_summary(path, metrics=registry):
+    summary = json.dumps(metrics.summary(), sort_keys=True)
+    if path == '-':
+        print(summary)
+    elif path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(summary + '\n')
+
+
+@contextmanager
+def reporting(args, item_counter='write.written', total=None, metrics=registry):
+    """Runs the progress line for the duration of the block and writes the JSON
+    summary when it exits, even if the run fails partway."""
+    configure_logging(args)
+    metrics.reset()
+    progress = None
+    if not getattr(args, 'no_progress', False):
+        progress = ProgressReporter(metrics, item_counter=item_counter, total=total).start()
+    try:
+        yield metrics
+    finally:
+        if progress:
+            progress.stop()
+        write_summary(getattr(args, 'metrics_json', '-'), metrics)
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .sync_assets import ASSETS_DIR, PROFILES, hash_file
+
+# Shrinks the bundled meme assets after sync_assets.py has named them:
+# images are re-encoded in place to a bounded resolution/quality and every
+# asset gets a small feed thumbnail. A manifest per folder records the
+# normalized hash, dimensions and byte sizes, so later runs skip anything
+# whose bytes haven't changed since it was normalized.
+#
+# Images need Pillow. Clips need ffmpeg/ffprobe on PATH and are skipped
+# (with a message) when they aren't installed.
+
+MANIFEST_NAME = '.normalize-manifest.json'
+MANIFEST_VERSION = 1
+
+DEFAULT_SETTINGS = {
+    'max_dimension': 1080,
+    'quality': 82,
+    'thumb_dimension': 320,
+    'thumb_quality': 70,
+    'clip_crf': 28,
+}
+
+THUMB_DIRS = {
+    'memes': os.path.join(ASSETS_DIR, 'memes_thumbs'),
+    'clips': os.path.join(ASSETS_DIR, 'memes_clips_thumbs'),
+}
+
+
+def load_manifest(folder, settings):
+    path = os.path.join(folder, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        # Changing any encode setting invalidates every entry
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('settings') == settings:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'settings': settings, 'files': {}}
+
+
+def save_manifest(folder, manifest):
+    path = os.path.join(folder, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def thumb_name(name):
+    return os.path.splitext(name)[0] + '.jpg'
+
+
+def normalize_image(path, thumb_path, settings):
+    # Runs in a worker process, so Pillow is only imported where it's used
+    from PIL import Image, ImageOps # type: ignore
+
+    source_bytes = os.path.getsize(path)
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    bound = (settings['max_dimension'], settings['max_dimension'])
+    resized = image.width > bound[0] or image.height > bound[1]
+    if resized:
+        image.thumbnail(bound, Image.LANCZOS)
+
+    tmp_path = path + '.tmp'
+    image.save(tmp_path, 'JPEG', quality=settings['quality'], optimize=True, progressive=True)
+    # Re-encoding a small, already-compressed file can make it bigger; keep the original then
+    if resized or os.path.getsize(tmp_path) < source_bytes:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+
+    with Image.open(path) as final:
+        width, height = final.size
+        thumb = ImageOps.exif_transpose(final).convert('RGB')
+    thumb.thumbnail((settings['thumb_dimension'], settings['thumb_dimension']), Image.LANCZOS)
+    thumb.save(thumb_path, 'JPEG', quality=settings['thumb_quality'], optimize=True)
+
+    return {
+        'width': width,
+        'height': height,
+        'source_bytes': source_bytes,
+        'bytes': os.path.getsize(path),
+        'thumb': {'width': thumb.width, 'height': thumb.height, 'bytes': os.path.getsize(thumb_path)},
+    }
+
+
+def probe_dimensions(path):
+    output = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height',
+         '-of', 'csv=p=0:s=x', path],
+        check=True, capture_output=True, text=True
+    ).stdout.strip()
+    width, height = output.split('x')[:2]
+    return int(width), int(height)
+
+
+def normalize_clip(path, thumb_path, settings):
+    source_bytes = os.path.getsize(path)
+    bound = settings['max_dimension']
+    # Cap the long side, keep the aspect ratio, and keep dimensions even for x264
+    scale = f"scale='if(gt(iw,ih),min({bound},iw),-2)':'if(gt(iw,ih),-2,min({bound},ih))'"
+    resized = max(probe_dimensions(path)) > bound
+    # Not named *.mp4, so a run interrupted mid-encode doesn't leave behind a
+    # file that sync_assets would pick up as a new clip
+    tmp_path = path + '.part'
+    try:
+        subprocess.run(
+            ['ffmpeg', '-v', 'error', '-y', '-i', path, '-vf', scale, '-c:v', 'libx264',
+             '-crf', str(settings['clip_crf']), '-preset', 'veryfast', '-c:a', 'aac', '-b:a', '96k',
+             '-movflags', '+faststart', '-f', 'mp4', tmp_path],
+            check=True
+        )
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # Same rule as images: a resized clip always replaces the original
+    if resized or os.path.getsize(tmp_path) < source_bytes:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+
+    thumb_bound = settings['thumb_dimension']
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-i', path, '-frames:v', '1', '-q:v', '5',
+         '-vf', f"scale='min({thumb_bound},iw)':-2", thumb_path],
+        check=True
+    )
+    width, height = probe_dimensions(path)
+    thumb_width, thumb_height = probe_dimensions(thumb_path)
+    return {
+        'width': width,
+        'height': height,
+        'source_bytes': source_bytes,
+        'bytes': os.path.getsize(path),
+        'thumb': {'width': thumb_width, 'height': thumb_height, 'bytes': os.path.getsize(thumb_path)},
+    }
+
+
+def normalize_file(kind, path, thumb_path, settings):
+    info = (normalize_clip if kind == 'clips' else normalize_image)(path, thumb_path, settings)
+    info['hash'] = hash_file(path)
+    stat = os.stat(path)
+    info['size'] = stat.st_size
+    info['mtime'] = stat.st_mtime_ns
+    return info
+
+
+def normalize_folder(kind, folder, thumb_folder, extensions, settings=None, workers=None, dry_run=False):
+    """Normalize every new or changed asset in `folder`. Returns a dict of counts."""
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    manifest = load_manifest(folder, settings)
+    entries = manifest['files']
+    counts = {'unchanged': 0, 'normalized': 0, 'failed': 0, 'forgotten': 0, 'bytes_saved': 0}
+
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith(extensions))
+    pending = []
+    for name in files:
+        entry = entries.get(name)
+        path = os.path.join(folder, name)
+        thumb_path = os.path.join(thumb_folder, thumb_name(name))
+        if entry and os.path.exists(thumb_path):
+            stat = os.stat(path)
+            # Size + mtime first; only hash when those moved (e.g. after a git checkout)
+            if (entry['size'], entry['mtime']) == (stat.st_size, stat.st_mtime_ns) or entry['hash'] == hash_file(path):
+                entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime_ns
+                counts['unchanged'] += 1
+                continue
+        pending.append((name, path, thumb_path))
+
+    for name in [name for name in entries if name not in files]:
+        del entries[name]
+        thumb_path = os.path.join(thumb_folder, thumb_name(name))
+        if os.path.exists(thumb_path) and not dry_run:
+            os.remove(thumb_path)
+        counts['forgotten'] += 1
+
+    if dry_run:
+        for name, _, _ in pending:
+            print(f"Would normalize {name}")
+        counts['normalized'] = len(pending)
+        return counts
+
+    os.makedirs(thumb_folder, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(normalize_file, kind, path, thumb_path, settings): name
+                   for name, path, thumb_path in pending}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                entries[name] = future.result()
+            except Exception as e:
+                print(f"Failed to normalize {name}: {e}")
+                counts['failed'] += 1
+                continue
+            counts['normalized'] += 1
+            counts['bytes_saved'] += entries[name]['source_bytes'] - entries[name]['bytes']
+
+    save_manifest(folder, manifest)
+    return counts
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Re-encode bundled meme assets and build feed thumbnails")
+    parser.add_argument('profiles', nargs='*', choices=sorted(PROFILES), default=sorted(PROFILES),
+                        help="Asset folders to normalize (default: all)")
+    parser.add_argument('--folder', help="Override the folder for a single profile")
+    parser.add_argument('--thumbs', help="Override the thumbnail folder for a single profile")
+    parser.add_argument('--workers', type=int, default=None, help="Encoding processes (default: CPU count)")
+    parser.add_argument('--max-dimension', type=int, default=DEFAULT_SETTINGS['max_dimension'])
+    parser.add_argument('--quality', type=int, default=DEFAULT_SETTINGS['quality'], help="JPEG quality")
+    parser.add_argument('--thumb-dimension', type=int, default=DEFAULT_SETTINGS['thumb_dimension'])
+    parser.add_argument('--dry-run', action='store_true', help="List what would be re-encoded")
+    args = parser.parse_args(argv)
+
+    settings = {
+        'max_dimension': args.max_dimension,
+        'quality': args.quality,
+        'thumb_dimension': args.thumb_dimension,
+    }
+    single = len(args.profiles) == 1
+    for profile in args.profiles:
+        folder = args.folder if args.folder and single else PROFILES[profile]['folder']
+        thumb_folder = args.thumbs if args.thumbs and single else THUMB_DIRS[profile]
+        if not os.path.isdir(folder):
+            print(f"Skipping {profile}: {folder} does not exist")
+            continue
+        if profile == 'clips' and not (shutil.which('ffmpeg') and shutil.which('ffprobe')):
+            print("Skipping clips: ffmpeg/ffprobe not found on PATH")
+            continue
+        counts = normalize_folder(profile, folder, thumb_folder, PROFILES[profile]['extensions'],
+                                  settings, args.workers, args.dry_run)
+        print(f"{profile}: " + ', '.join(f"{count} {label}" for label, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import argparse
+import functools
+import io
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import REPO_ROOT, aws
+
+# Perceptual-hash index of meme images, for finding the same meme uploaded
+# more than once (rescaled, recompressed, re-saved as PNG...). Each image gets
+# a 64-bit difference hash; near-duplicates are hashes within a small Hamming
+# distance, found through a BK-tree instead of comparing every pair.
+#
+#   python -m jestr_tools phash build --source s3
+#   python -m jestr_tools phash find Memes/1234.jpg
+#   python -m jestr_tools phash report --distance 6
+#
+# Needs Pillow.
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.path.join(REPO_ROOT, 'src/services/retired/.meme_phash_index.json')
+INDEX_VERSION = 1
+HASH_SIZE = 8
+# Distance at which two 64-bit dHashes are almost always the same image
+DEFAULT_DISTANCE = 6
+# Images being downloaded/hashed at once; bounds memory while streaming
+WINDOW = 256
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+S3_BUCKET = 'jestr-meme-uploads'
+S3_FOLDER = 'Memes'
+
+
+def dhash(data):
+    """64-bit difference hash of an image given as bytes or a path."""
+    from PIL import Image # type: ignore
+
+    with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as image:
+        # Shrinking to 9x8 grayscale throws away scale, compression and most color shifts
+        pixels = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Metric tree over Hamming distance. A lookup only descends into children
+    whose edge distance is within max_distance of the query's distance to the
+    node, which prunes most of the tree for small radii."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, key):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [key], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [key], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """Returns (distance, key) pairs within max_distance, nearest first."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_value, keys, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                found.extend((distance, key) for key in keys)
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+class PerceptualIndex:
+    """Key -> (etag, hash) for every indexed image, saved as JSON. Keys are S3
+    keys or local paths; the etag (S3 ETag, or size-mtime locally) lets a
+    rebuild skip images that haven't changed."""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.entries = {key: (etag, int(value, 16)) for key, (etag, value) in data['entries'].items()}
+        self._tree = None
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION,
+                       'entries': {key: [etag, f'{value:016x}'] for key, (etag, value) in self.entries.items()}}, f)
+        os.replace(tmp_path, self.path)
+
+    def set(self, key, etag, value):
+        self.entries[key] = (etag, value)
+        self._tree = None
+
+    def tree(self):
+        if self._tree is None:
+            self._tree = BKTree()
+            for key, (_, value) in self.entries.items():
+                self._tree.add(value, key)
+        return self._tree
+
+    def find(self, value, max_distance=DEFAULT_DISTANCE):
+        return self.tree().search(value, max_distance)
+
+    def clusters(self, max_distance=DEFAULT_DISTANCE):
+        """Groups of near-duplicate keys (two or more). Each group is built
+        around its first key, the representative, and every other member is
+        within max_distance of it. Matches aren't chained through other
+        members, so A~B and B~C don't put A and C together unless A~C."""
+        tree = self.tree()
+        assigned = set()
+        groups = []
+        for key in sorted(self.entries):
+            if key in assigned:
+                continue
+            members = sorted(other for _, other in tree.search(self.entries[key][1], max_distance)
+                             if other != key and other not in assigned)
+            if members:
+                assigned.add(key)
+                assigned.update(members)
+                groups.append([key] + members)
+        return sorted(groups, key=lambda g: (-len(g), g[0]))
+
+    def cluster_map(self, max_distance=DEFAULT_DISTANCE):
+        """Key -> cluster id for every key that has near-duplicates."""
+        return {key: group[0] for group in self.clusters(max_distance) for key in group}
+
+
+def local_images(folder):
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            path = os.path.join(folder, name)
+            stat = os.stat(path)
+            yield path, f'{stat.st_size}-{stat.st_mtime_ns}'
+
+
+def s3_images(s3_client, bucket, prefix):
+    # Same listing the tagger uses, imported here to keep `find`/`report` off boto3
+    from .meme_tagger import list_images
+    return list_images(s3_client, bucket, prefix)
+
+
+_s3_client = None
+
+
+def _init_s3_worker(region, settings):
+    global _s3_client
+    import boto3 # type: ignore
+    # A fresh session per worker process, since boto3 sessions shouldn't cross
+    # a fork, made with the parent's resolved region and client settings
+    aws.settings.update(settings)
+    _s3_client = boto3.session.Session(region_name=region).client('s3', config=aws.client_config())
+
+
+def _hash_s3_object(bucket, key):
+    return dhash(_s3_client.get_object(Bucket=bucket, Key=key)['Body'].read())
+
+
+class _S3Hasher:
+    # A picklable callable, so the bucket travels to the worker processes
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def __call__(self, key):
+        return _hash_s3_object(self.bucket, key)
+
+
+def _hash_local(path):
+    return dhash(path)
+
+
+def build(index, sources, hash_one, workers=None, initializer=None, window=WINDOW):
+    """Hash every (key, etag) from `sources` not already indexed with that
+    etag, in a process pool. Keys no longer listed are dropped. Returns counts."""
+    counts = {'listed': 0, 'unchanged': 0, 'hashed': 0, 'failed': 0, 'dropped': 0}
+    seen = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        pending = {}
+
+        def drain():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, etag = pending.pop(future)
+                try:
+                    index.set(key, etag, future.result())
+                    counts['hashed'] += 1
+                except Exception as e:
+                    logger.error(f"Error hashing {key}: {e}")
+                    counts['failed'] += 1
+
+        for key, etag in sources:
+            counts['listed'] += 1
+            seen.add(key)
+            current = index.entries.get(key)
+            if current and current[0] == etag:
+                counts['unchanged'] += 1
+                continue
+            pending[pool.submit(hash_one, key)] = (key, etag)
+            if len(pending) >= window:
+                drain()
+        while pending:
+            drain()
+
+    for key in [key for key in index.entries if key not in seen]:
+        del index.entries[key]
+        counts['dropped'] += 1
+    index._tree = None
+    return counts
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Perceptual-hash index for finding near-duplicate memes")
+    parser.add_argument('--index', default=INDEX_PATH, help="Index file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Hash new and changed images into the index")
+    build_parser.add_argument('--source', default='s3', help="'s3' for the Memes prefix, or a local folder")
+    build_parser.add_argument('--bucket', default=S3_BUCKET)
+    build_parser.add_argument('--prefix', default=S3_FOLDER)
+    build_parser.add_argument('--workers', type=int, default=None, help="Hashing processes (default: CPU count)")
+
+    find_parser = commands.add_parser('find', help="List near-duplicates of an indexed key or an image file")
+    find_parser.add_argument('target')
+    find_parser.add_argument('--distance', type=int, default=DEFAULT_DISTANCE)
+
+    report_parser = commands.add_parser('report', help="Print every near-duplicate cluster")
+    report_parser.add_argument('--distance', type=int, default=DEFAULT_DISTANCE)
+    report_parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = PerceptualIndex(args.index)
+
+    if args.command == 'build':
+        if args.source == 's3':
+            sources = s3_images(aws.client('s3'), args.bucket, args.prefix)
+            initializer = functools.partial(_init_s3_worker, aws.session().region_name, dict(aws.settings))
+            hash_one = _S3Hasher(args.bucket)
+        else:
+            sources, hash_one, initializer = local_images(args.source), _hash_local, None
+        counts = build(index, sources, hash_one, args.workers, initializer)
+        index.save()
+        print(', '.join(f"{count} {label}" for label, count in counts.items()))
+
+    elif args.command == 'find':
+        if args.target in index.entries:
+            value = index.entries[args.target][1]
+        else:
+            value = dhash(args.target)
+        for distance, key in index.find(value, args.distance):
+            if key != args.target:
+                print(f"{distance:>3}  {key}")
+
+    else:
+        clusters = index.clusters(args.distance)
+        if args.json:
+            print(json.dumps(clusters, indent=1))
+            return
+        duplicates = sum(len(group) - 1 for group in clusters)
+        print(f"{len(index.entries)} images, {len(clusters)} clusters, {duplicates} redundant copies")
+        for group in clusters:
+            print(f"\n{group[0]} ({len(group) - 1} copies)")
+            for key in group[1:]:
+                print(f"    {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+import argparse
+import itertools
+import logging
+
+from . import metrics
+from .aws import LazyTable
+from .scan_engine import parallel_scan, projection_kwargs, scan_page, DEFAULT_SEGMENTS, DEFAULT_WORKERS
+from .write_pipeline import UpdateWorkers, diff_update, DEFAULT_UPDATE_WORKERS, DEFAULT_MAX_IN_FLIGHT
+from .run_journal import RunJournal, JOURNAL_DIR
+from .backfill_plan import PlanWriter, read_plan, estimate_write_units, projected_seconds, format_summary
+from .export_reader import iter_export_files, blank_attribute
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Created on first use, from the shared session in aws.py
+table = LazyTable('Memes')
+
+EMAIL = 'pope.dawson@gmail.com'
+PROFILE_PIC_URL = 'https://jestr-bucket.s3.amazonaws.com/ProfilePictures/pope.dawson@gmail.com-profilePic-1719862276108.jpg'
+
+MEME_UPDATE_EXPRESSION = """
+SET Caption = :caption,
+    CommentCount = :comment_count,
+    DownloadCount = :download_count,
+    Email = :email,
+    LikeCount = :like_count,
+    ProfilePicUrl = :profile_pic_url,
+    ShareCount = :share_count,
+    #status_field = :status,
+    UploadTimestamp = :upload_timestamp,
+    Username = :username
+"""
+
+MEME_ATTRIBUTE_NAMES = {
+    '#status_field': 'Status'
+}
+
+# Attribute written for each value placeholder, used to size plan entries
+MEME_ATTRIBUTES = {
+    ':caption': 'Caption',
+    ':comment_count': 'CommentCount',
+    ':download_count': 'DownloadCount',
+    ':email': 'Email',
+    ':like_count': 'LikeCount',
+    ':profile_pic_url': 'ProfilePicUrl',
+    ':share_count': 'ShareCount',
+    ':status': 'Status',
+    ':upload_timestamp': 'UploadTimestamp',
+    ':username': 'Username'
+}
+
+# Plans are applied later, so only touch memes whose email is still blank
+BLANK_EMAIL_CONDITION = 'attribute_not_exists(Email) OR Email = :blank_email'
+# A snapshot can also be older than a delete, and update_item would recreate the meme
+SNAPSHOT_CONDITION = 'attribute_exists(MemeID) AND (attribute_not_exists(Email) OR Email = :blank_email)'
+
+# What diff mode reads for each meme
+DIFF_ATTRIBUTES = ('MemeID',) + tuple(MEME_ATTRIBUTES.values())
+
+def generate_meme_values_batch(n, synthetic):
+    # Values for n memes' updates, drawn a column at a time from the seeded generator
+    columns = synthetic.engagement(n)
+    return [
+        {
+            ':caption': caption,
+            ':comment_count': 0,
+            ':download_count': download_count,
+            ':email': EMAIL,
+            ':like_count': like_count,
+            ':profile_pic_url': PROFILE_PIC_URL,
+            ':share_count': share_count,
+            ':status': 'active',
+            ':upload_timestamp': upload_timestamp,
+            ':username': 'Anon'
+        }
+        for caption, download_count, like_count, share_count, upload_timestamp in zip(
+            columns['Caption'], columns['DownloadCount'], columns['LikeCount'],
+            columns['ShareCount'], columns['UploadTimestamp']
+        )
+    ]
+
+def build_meme_update(item, expression_values):
+    return {
+        'Key': {'MemeID': item['MemeID']},
+        'UpdateExpression': MEME_UPDATE_EXPRESSION,
+        'ExpressionAttributeNames': MEME_ATTRIBUTE_NAMES,
+        'ExpressionAttributeValues': expression_values
+    }
+
+def is_missing(item, name):
+    # A blank Email is what marks a meme for the backfill; for everything else
+    # an empty value (e.g. a deliberately blank Caption) counts as populated
+    if name == 'Email':
+        return item.get(name, '') == ''
+    return name not in item
+
+def build_meme_diff(item, expression_values):
+    # Diff mode only fills attributes the meme doesn't have yet (Email among
+    # them, since it's blank), so anything already populated, like a LikeCount
+    # the app has been incrementing, is left alone. None if nothing is missing.
+    desired = {MEME_ATTRIBUTES[placeholder]: value for placeholder, value in expression_values.items()
+               if is_missing(item, MEME_ATTRIBUTES[placeholder])}
+    return diff_update({'MemeID': item['MemeID']}, item, desired)
+
+def update_meme(item, expression_values, guard=False, diff=False):
+    try:
+        if diff:
+            # The diff's condition already covers a deleted or no longer blank meme
+            update = build_meme_diff(item, expression_values)
+            if update:
+                table.update_item(**update)
+        else:
+            update = build_meme_update(item, expression_values)
+            table.update_item(**(guard_snapshot_update(update) if guard else update))
+        logger.debug(f"Updated MemeID: {item['MemeID']}")
+        return True
+    except Exception as e:
+        logger.error(f"Error updating MemeID {item['MemeID']}: {str(e)}")
+        return False
+
+def guard_snapshot_update(update):
+    # Updates worked out from a snapshot are only sent if the live item still qualifies
+    update['ConditionExpression'] = SNAPSHOT_CONDITION
+    update['ExpressionAttributeValues'] = dict(update['ExpressionAttributeValues'], **{':blank_email': ''})
+    return update
+
+def snapshot_pages(snapshot, workers=None, journal=None, diff=False):
+    # Blank-email memes from a local table export, one data file at a time.
+    # File numbers are checkpointed like scan segments.
+    attributes = DIFF_ATTRIBUTES if diff else ('MemeID',)
+    return iter_export_files(snapshot, workers=workers, keep=blank_attribute('Email'), attributes=attributes,
+                             skip_files=journal.finished_segments if journal else ())
+
+def blank_email_scan_kwargs(diff=False):
+    # Scan for items with blank email. Diff mode also reads the attributes it
+    # would write, to work out which ones are missing.
+    from boto3.dynamodb.conditions import Attr # type: ignore
+    kwargs = projection_kwargs(DIFF_ATTRIBUTES) if diff else {'ProjectionExpression': 'MemeID'}
+    kwargs['FilterExpression'] = Attr('Email').eq('') | Attr('Email').not_exists()
+    return kwargs
+
+def plan_memes(plan_path, total_segments=DEFAULT_SEGMENTS, max_workers=DEFAULT_WORKERS,
+               write_workers=DEFAULT_UPDATE_WORKERS, max_wcu=None, seed=None, snapshot=None, snapshot_workers=None):
+    # Work out every update the backfill would make and write it to a plan file, without touching the table
+    header = {
+        'script': 'processMemes',
+        'table': table.name,
+        'update_expression': MEME_UPDATE_EXPRESSION,
+        'attribute_names': MEME_ATTRIBUTE_NAMES,
+        'condition_expression': SNAPSHOT_CONDITION if snapshot else BLANK_EMAIL_CONDITION,
+        'condition_values': {':blank_email': ''}
+    }
+    from .synthetic_memes import SyntheticMemes
+    synthetic = SyntheticMemes(seed)
+    with PlanWriter(plan_path, header) as plan:
+        def process_page(segment, items):
+            for item, values in zip(items, generate_meme_values_batch(len(items), synthetic)):
+                written = {MEME_ATTRIBUTES[placeholder]: value for placeholder, value in values.items()}
+                written['MemeID'] = item['MemeID']
+                plan.add(item['MemeID'], values, estimate_write_units(written))
+        
+        if snapshot:
+            for file_number, items in snapshot_pages(snapshot, snapshot_workers):
+                process_page(file_number, items)
+        else:
+            parallel_scan(table, process_page, total_segments=total_segments, max_workers=max_workers,
+                          scan_kwargs=blank_email_scan_kwargs())
+    
+    seconds = projected_seconds(plan.count, plan.estimated_wcu, write_workers, max_wcu)
+    logger.info(format_summary(plan.count, plan.estimated_wcu, seconds))
+    logger.info(f"Plan written to {plan_path}; run with --apply {plan_path} to execute it")
+    return plan.count
+
+def apply_plan(plan_path, write_workers=DEFAULT_UPDATE_WORKERS, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+               max_wcu=None, journal=None):
+    # Execute a plan from plan_memes() without rescanning the table
+    header, entries = read_plan(plan_path)
+    if header.get('script') != 'processMemes':
+        raise ValueError(f"{plan_path} was made by {header.get('script')}, not processMemes")
+    logger.info(f"Applying plan from {header['created']} to {header['table']}")
+    
+    committed = journal.committed if journal else set()
+    with UpdateWorkers(table, max_workers=write_workers, max_in_flight=max_in_flight, max_wcu_per_second=max_wcu) as writer:
+        for meme_id, values in entries:
+            if meme_id in committed:
+                continue
+            future = writer.submit(
+                Key={'MemeID': meme_id},
+                UpdateExpression=header['update_expression'],
+                ConditionExpression=header['condition_expression'],
+                ExpressionAttributeNames=header['attribute_names'],
+                ExpressionAttributeValues=dict(values, **header['condition_values'])
+            )
+            if journal:
+                future.add_done_callback(lambda f, meme_id=meme_id: f.result() and journal.record_committed(meme_id))
+    
+    stats = writer.stats.as_dict()
+    logger.info(f"Total memes updated: {stats['written']} (failed: {stats['failed']}, no longer blank: {stats['conflicts']}, "
+                f"retries: {stats['retries']}, throttles: {stats['throttles']}, consumed WCU: {stats['consumed_wcu']:.1f})")
+    return stats
+
+def update_memes(total_segments=DEFAULT_SEGMENTS, max_workers=DEFAULT_WORKERS, write_workers=DEFAULT_UPDATE_WORKERS,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_wcu=None, journal=None, seed=None, confirm=True,
+                 snapshot=None, snapshot_workers=None, diff=False):
+    scan_kwargs = blank_email_scan_kwargs(diff)
+    pages = snapshot_pages(snapshot, snapshot_workers, journal, diff) if snapshot else None
+    # One seeded generator for the trial meme and the rest, so --seed reproduces the whole run
+    from .synthetic_memes import SyntheticMemes
+    synthetic = SyntheticMemes(seed)
+    
+    updated_count = 0
+    first_item = None
+    if confirm and (journal is None or not journal.resumed):
+        # Find a single item to try the update on first
+        if snapshot:
+            decoded = []
+            for page in pages:
+                decoded.append(page)
+                if page[1]:
+                    first_item = page[1][0]
+                    break
+            pages = itertools.chain(decoded, pages)
+        else:
+            response = scan_page(table, **scan_kwargs)
+            while True:
+                items = response.get('Items', [])
+                if items:
+                    first_item = items[0]
+                    break
+                if 'LastEvaluatedKey' not in response:
+                    break
+                response = scan_page(table, ExclusiveStartKey=response['LastEvaluatedKey'], **scan_kwargs)
+        
+        if not first_item:
+            logger.info("No memes found with blank email.")
+            return
+        
+        # Update the first item
+        success = update_meme(first_item, generate_meme_values_batch(1, synthetic)[0], guard=bool(snapshot), diff=diff)
+        
+        if not success:
+            logger.error("Failed to update the first meme. Exiting.")
+            return
+        updated_count = 1
+        if journal:
+            journal.record_committed(first_item['MemeID'])
+        
+        # Ask for confirmation to continue
+        user_input = input("Do you want to update the rest of the memes? (yes/no): ").lower()
+        if user_input != 'yes':
+            logger.info("Update process stopped after the first meme.")
+            return
+    
+    # Update the rest of the items. The first meme now has an Email, so the
+    # filter keeps the parallel scan from picking it up again; a snapshot
+    # still lists it, so it's skipped by ID there.
+    committed = journal.committed if journal else set()
+    if first_item:
+        committed = committed | {first_item['MemeID']}
+    with UpdateWorkers(table, max_workers=write_workers, max_in_flight=max_in_flight, max_wcu_per_second=max_wcu) as writer:
+        def process_page(segment, items):
+            items = [item for item in items if item['MemeID'] not in committed]
+            pending = []
+            for item, values in zip(items, generate_meme_values_batch(len(items), synthetic)):
+                if diff:
+                    update = build_meme_diff(item, values)
+                    if update is None:
+                        writer.skip()
+                        continue
+                else:
+                    update = build_meme_update(item, values)
+                    if snapshot:
+                        update = guard_snapshot_update(update)
+                pending.append((item['MemeID'], writer.submit(**update)))
+            # Wait for the whole page so the segment checkpoint never runs ahead of the writes
+            written = True
+            for meme_id, future in pending:
+                result = future.result()
+                if result and journal:
+                    journal.record_committed(meme_id)
+                written = written and result is not False
+            return written
+        
+        if snapshot:
+            # Reads come from the export, so the only table traffic is the writes
+            for file_number, items in pages:
+                # A file with failed writes isn't marked finished, so a resume redoes it
+                if process_page(file_number, items) and journal:
+                    journal.checkpoint(file_number, None)
+        else:
+            parallel_scan(
+                table,
+                process_page,
+                total_segments=total_segments,
+                max_workers=max_workers,
+                scan_kwargs=scan_kwargs,
+                start_keys=journal.start_keys if journal else None,
+                skip_segments=journal.finished_segments if journal else (),
+                checkpoint=journal.checkpoint if journal else None
+            )
+    
+    stats = writer.stats.as_dict()
+    updated_count += stats['written']
+    logger.info(f"Total memes updated: {updated_count} (failed: {stats['failed']}, changed since read: {stats['conflicts']}, "
+                f"nothing to change: {stats['skipped']}, retries: {stats['retries']}, throttles: {stats['throttles']}, "
+                f"consumed WCU: {stats['consumed_wcu']:.1f})")
+    return stats
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Backfill memes that have a blank email")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--plan', metavar='PLAN_FILE', help="Scan and write the updates to a plan file without applying them")
+    mode.add_argument('--apply', metavar='PLAN_FILE', help="Apply a plan file from --plan without rescanning")
+    parser.add_argument('--snapshot', metavar='EXPORT_DIR', help="Read memes from a local DynamoDB export instead of scanning the table")
+    parser.add_argument('--snapshot-workers', type=int, default=None, help="Processes decoding export files (default: CPU count)")
+    parser.add_argument('--diff', action='store_true',
+                        help="Only fill attributes a meme is missing, conditioned on what was read, and skip memes with nothing to fill")
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help="Parallel scan segments")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Scan worker threads")
+    parser.add_argument('--write-workers', type=int, default=DEFAULT_UPDATE_WORKERS, help="Concurrent update_item workers")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Max queued or running updates")
+    parser.add_argument('--max-wcu', type=float, default=None, help="Cap on consumed write capacity units per second")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for the generated values")
+    parser.add_argument('--resume', metavar='RUN_ID', help="Resume an interrupted run from its journal")
+    parser.add_argument('--journal-dir', default=JOURNAL_DIR, help="Where run journals are kept")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.snapshot and args.apply:
+        parser.error("--apply reads the plan file, so it can't be combined with --snapshot")
+    if args.diff and (args.plan or args.apply):
+        parser.error("Plans hold whole updates, so --diff can't be combined with --plan or --apply")
+    
+    if args.plan:
+        logger.info("Planning update for memes with blank email")
+        with metrics.reporting(args, item_counter='snapshot.items' if args.snapshot else 'scan.items'):
+            plan_memes(args.plan, total_segments=args.segments, max_workers=args.workers,
+                       write_workers=args.write_workers, max_wcu=args.max_wcu, seed=args.seed,
+                       snapshot=args.snapshot, snapshot_workers=args.snapshot_workers)
+        return
+    
+    if args.resume:
+        journal = RunJournal.resume(args.resume, journal_dir=args.journal_dir)
+        # Segment checkpoints only line up with the segment count they were taken with
+        args.segments = journal.params.get('segments', args.segments)
+        args.apply = args.apply or journal.params.get('plan')
+        args.snapshot = args.snapshot or journal.params.get('snapshot')
+        args.diff = args.diff or journal.params.get('diff', False)
+    else:
+        journal = RunJournal.start('processMemes', {'segments': args.segments, 'plan': args.apply, 'snapshot': args.snapshot,
+                                                    'diff': args.diff}, journal_dir=args.journal_dir)
+    logger.info(f"Run ID: {journal.run_id} (resume with --resume {journal.run_id})")
+    
+    with journal, metrics.reporting(args):
+        if args.apply:
+            apply_plan(args.apply, write_workers=args.write_workers, max_in_flight=args.max_in_flight,
+                       max_wcu=args.max_wcu, journal=journal)
+        else:
+            logger.info("Starting update process for memes with blank email")
+            update_memes(total_segments=args.segments, max_workers=args.workers, write_workers=args.write_workers,
+                         max_in_flight=args.max_in_flight, max_wcu=args.max_wcu, journal=journal, seed=args.seed,
+                         snapshot=args.snapshot, snapshot_workers=args.snapshot_workers, diff=args.diff)
+    logger.info("Update process completed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+from . import EXTRAS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Journals are kept next to the scripts unless a directory is passed in
+JOURNAL_DIR = os.path.join(EXTRAS_DIR, '.journal')
+FLUSH_INTERVAL = 1.0
+
+
+def _encode(value):
+    # Scan keys come back from boto3 with numbers as Decimal
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    raise TypeError(f"Can't journal value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if '__decimal__' in obj and len(obj) == 1:
+        return Decimal(obj['__decimal__'])
+    return obj
+
+
+def new_run_id(script):
+    return f"{script}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+
+class RunJournal:
+    """Append-only progress journal for one backfill run.
+
+    Each line is a JSON record: a 'start' header, batches of committed MemeIDs,
+    and per-segment scan checkpoints (the LastEvaluatedKey after a page was
+    fully written, or null once the segment is finished). Records are buffered
+    and written + fsync'd by a background thread every flush_interval seconds,
+    so journaling never sits on the write path. A crash loses at most the last
+    interval, which a resumed run simply redoes.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.resumed = False
+        self.header = {}
+        self.committed = set()
+        self.start_keys = {}
+        self.finished_segments = set()
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending = []
+        self._pending_ids = []
+        self._stop = threading.Event()
+        self._file = None
+        self._flusher = None
+
+    @classmethod
+    def start(cls, script, params, run_id=None, journal_dir=JOURNAL_DIR, flush_interval=FLUSH_INTERVAL):
+        os.makedirs(journal_dir, exist_ok=True)
+        run_id = run_id or new_run_id(script)
+        path = os.path.join(journal_dir, f"{run_id}.jsonl")
+        if os.path.exists(path):
+            raise FileExistsError(f"Journal for run {run_id} already exists; use --resume {run_id}")
+
+        journal = cls(path, flush_interval)
+        journal.header = {'type': 'start', 'run_id': run_id, 'script': script, 'params': params}
+        journal._open()
+        journal._append(journal.header)
+        journal.flush()
+        return journal
+
+    @classmethod
+    def resume(cls, run_id, journal_dir=JOURNAL_DIR, flush_interval=FLUSH_INTERVAL):
+        path = os.path.join(journal_dir, f"{run_id}.jsonl")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No journal found for run {run_id} in {journal_dir}")
+
+        journal = cls(path, flush_interval)
+        journal.resumed = True
+        journal._replay()
+        journal._open()
+        journal._append({'type': 'resume', 'at': datetime.now().isoformat()})
+        return journal
+
+    @property
+    def run_id(self):
+        return self.header.get('run_id')
+
+    @property
+    def params(self):
+        return self.header.get('params', {})
+
+    def _replay(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line, object_hook=_decode)
+                except ValueError:
+                    # A torn last line from a crash mid-write; everything before it is intact
+                    logger.warning(f"Ignoring unreadable journal line in {self.path}")
+                    continue
+
+                kind = record.get('type')
+                if kind == 'start':
+                    self.header = record
+                elif kind == 'committed':
+                    self.committed.update(record['ids'])
+                elif kind == 'checkpoint':
+                    segment = record['segment']
+                    if record['key'] is None:
+                        self.finished_segments.add(segment)
+                        self.start_keys.pop(segment, None)
+                    else:
+                        self.start_keys[segment] = record['key']
+
+        logger.info(f"Resuming {self.run_id}: {len(self.committed)} memes committed, "
+                    f"{len(self.finished_segments)} segments finished")
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._flusher = threading.Thread(target=self._flush_loop, name='journal', daemon=True)
+        self._flusher.start()
+
+    def _append(self, record):
+        with self._lock:
+            self._pending.append(record)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def record_committed(self, meme_id):
+        with self._lock:
+            self._pending_ids.append(meme_id)
+
+    def checkpoint(self, segment, last_key):
+        """Record that everything in `segment` up to last_key is written.
+        last_key=None marks the segment as finished."""
+        with self._lock:
+            # Committed IDs go out first so a checkpoint never gets ahead of them
+            if self._pending_ids:
+                self._pending.append({'type': 'committed', 'ids': self._pending_ids})
+                self._pending_ids = []
+            self._pending.append({'type': 'checkpoint', 'segment': segment, 'key': last_key})
+
+    def flush(self):
+        # Writers only hold _lock long enough to swap buffers; the write and
+        # fsync happen under _io_lock so batches still land in order
+        with self._io_lock:
+            with self._lock:
+                if self._pending_ids:
+                    self._pending.append({'type': 'committed', 'ids': self._pending_ids})
+                    self._pending_ids = []
+                records, self._pending = self._pending, []
+            if not records or self._file is None:
+                return
+            self._file.write(''.join(json.dumps(r, default=_encode) + '\n' for r in records))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+        self.flush()
+        with self._io_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
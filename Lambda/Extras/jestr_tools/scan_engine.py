@@ -0,0 +1,128 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .metrics import registry
+from .write_pipeline import backoff_delay, is_throttle_error, MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the parallel scan. Each segment is scanned by its own worker,
+# so more segments than workers just queues the extra segments up.
+DEFAULT_SEGMENTS = 8
+DEFAULT_WORKERS = 8
+
+
+def projection_kwargs(attributes):
+    # Scan kwargs reading only the given attributes; every name gets a
+    # placeholder since some (Status, ...) are reserved words
+    names = {f'#p{i}': name for i, name in enumerate(attributes)}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+
+def scan_page(table, max_retries=MAX_RETRIES, **kwargs):
+    # One table.scan call, retried with jittered backoff when throttled.
+    # botocore retries too, but gives up after a few attempts.
+    attempt = 0
+    while True:
+        try:
+            with registry.timer('dynamodb.scan'):
+                return table.scan(**kwargs)
+        except Exception as e:
+            if not is_throttle_error(e) or attempt >= max_retries:
+                raise
+            registry.incr('scan.throttles')
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+def scan_segment(table, segment, total_segments, process_page, scan_kwargs=None, start_key=None, checkpoint=None):
+    """Scan one segment to the end, handing each page of items to process_page.
+
+    process_page(segment, items) is called once per page. If start_key is set
+    the scan picks up from there instead of the start of the segment. After
+    each page is processed, checkpoint(segment, last_key) is called with the
+    page's LastEvaluatedKey, or None once the segment is exhausted. Returns the
+    number of items seen in this segment.
+
+    If process_page returns False (some of the page wasn't written), the
+    segment is still scanned to the end but no further checkpoints are taken,
+    so a resumed run rescans from the last page that was fully written.
+    """
+    kwargs = dict(scan_kwargs or {})
+    kwargs['Segment'] = segment
+    kwargs['TotalSegments'] = total_segments
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+
+    item_count = 0
+    page_count = 0
+    held = False
+    while True:
+        response = scan_page(table, **kwargs)
+        items = response.get('Items', [])
+        page_count += 1
+        item_count += len(items)
+        registry.incr('scan.pages')
+        registry.incr('scan.items', len(items))
+
+        if items and process_page(segment, items) is False and not held:
+            held = True
+            logger.warning(f"Segment {segment}: writes failed, holding its checkpoint so a resume redoes them")
+
+        last_key = response.get('LastEvaluatedKey')
+        if checkpoint and not held:
+            checkpoint(segment, last_key or None)
+        if not last_key:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+
+    logger.debug(f"Segment {segment}/{total_segments} done: {item_count} items in {page_count} pages")
+    return item_count
+
+
+def parallel_scan(table, process_page, total_segments=DEFAULT_SEGMENTS, max_workers=DEFAULT_WORKERS, scan_kwargs=None,
+                  start_keys=None, skip_segments=(), checkpoint=None):
+    """Run a DynamoDB parallel scan (Segment/TotalSegments) across a thread pool.
+
+    Every segment follows LastEvaluatedKey until it is exhausted, and pages are
+    streamed to process_page(segment, items) from the worker scanning that
+    segment, so work starts as soon as the first page lands. scan_kwargs is
+    passed through to table.scan (FilterExpression, ProjectionExpression, ...).
+
+    For resumed runs, start_keys maps segment -> ExclusiveStartKey,
+    skip_segments lists segments that already finished, and checkpoint is
+    passed down to scan_segment.
+
+    Returns the total number of items scanned. If any segment fails, the first
+    error is re-raised after the other segments finish.
+    """
+    total_segments = max(1, int(total_segments))
+    max_workers = max(1, min(int(max_workers), total_segments))
+
+    start_keys = start_keys or {}
+    skip_segments = set(skip_segments)
+    segments = [segment for segment in range(total_segments) if segment not in skip_segments]
+    if not segments:
+        return 0
+
+    total_items = 0
+    first_error = None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan') as executor:
+        futures = {
+            executor.submit(scan_segment, table, segment, total_segments, process_page, scan_kwargs,
+                            start_keys.get(segment), checkpoint): segment
+            for segment in segments
+        }
+        for future in as_completed(futures):
+            segment = futures[future]
+            try:
+                total_items += future.result()
+            except Exception as e:
+                logger.error(f"Error scanning segment {segment}: {str(e)}")
+                if first_error is None:
+                    first_error = e
+
+    if first_error is not None:
+        raise first_error
+    return total_items
@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from . import REPO_ROOT
+
+# Keeps the bundled meme folders sequentially named without renaming the whole
+# folder on every run. A manifest in each folder maps content hash -> assigned
+# name, so a run only hashes files that are new or whose size/mtime changed,
+# only renames files that don't have a name yet, and deletes byte-identical
+# duplicates. Names that are already assigned never move, which keeps the
+# bundler cache (keyed on these filenames) warm.
+
+ASSETS_DIR = os.path.join(REPO_ROOT, 'src/assets')
+MANIFEST_NAME = '.asset-manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+# Below this many files, a process pool costs more than it saves
+POOL_THRESHOLD = 8
+
+PROFILES = {
+    'memes': {
+        'folder': os.path.join(ASSETS_DIR, 'memes'),
+        'extensions': ('.jpg', '.jpeg'),
+        'pattern': '{index}.jpeg',
+    },
+    'clips': {
+        'folder': os.path.join(ASSETS_DIR, 'memes_clips'),
+        'extensions': ('.mp4',),
+        'pattern': 'd{index}.mp4',
+    },
+}
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(paths, workers=None):
+    if len(paths) < POOL_THRESHOLD:
+        return [hash_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hash_file, paths, chunksize=4))
+
+
+def name_regex(pattern):
+    prefix, suffix = pattern.split('{index}')
+    return re.compile(re.escape(prefix) + r'(\d+)' + re.escape(suffix) + '$')
+
+
+def load_manifest(folder):
+    path = os.path.join(folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'version': MANIFEST_VERSION, 'next_index': 1, 'entries': {}}
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {path}")
+    return manifest
+
+
+def save_manifest(folder, manifest):
+    # Write to a temp file and swap it in, so an interrupted run never leaves a torn manifest
+    path = os.path.join(folder, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def sync_folder(folder, extensions, pattern, workers=None, dry_run=False):
+    """Bring one folder in line with its manifest. Returns a dict of counts."""
+    manifest = load_manifest(folder)
+    entries = manifest['entries']
+    by_name = {entry['name']: digest for digest, entry in entries.items()}
+    numbered = name_regex(pattern)
+    counts = {'unchanged': 0, 'hashed': 0, 'renamed': 0, 'duplicates': 0, 'forgotten': 0}
+
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith(extensions))
+    stats = {name: os.stat(os.path.join(folder, name)) for name in files}
+
+    # Only files the manifest can't vouch for by size + mtime get hashed
+    to_hash = []
+    for name in files:
+        entry = entries.get(by_name.get(name))
+        if entry and entry['size'] == stats[name].st_size and entry['mtime'] == stats[name].st_mtime_ns:
+            counts['unchanged'] += 1
+        else:
+            to_hash.append(name)
+    hashed = dict(zip(to_hash, hash_files([os.path.join(folder, name) for name in to_hash], workers)))
+    counts['hashed'] = len(hashed)
+
+    final_names = set(files)
+
+    def record(digest, name, source):
+        # Renames keep size and mtime, so the listing stat is still accurate
+        entries[digest] = {'name': name, 'size': stats[source].st_size, 'mtime': stats[source].st_mtime_ns}
+        by_name[name] = digest
+        match = numbered.match(name)
+        if match:
+            manifest['next_index'] = max(manifest['next_index'], int(match.group(1)) + 1)
+
+    def holder(digest):
+        # Name of a file on disk that currently holds these bytes, if any
+        entry = entries.get(digest)
+        if not entry or entry['name'] not in final_names:
+            return None
+        name = entry['name']
+        return name if hashed.get(name, digest) == digest else None
+
+    def claim_order(name):
+        # Files the manifest already names go first, then correctly numbered
+        # ones, so when bytes collide it's always an unnamed copy that goes
+        return (0 if name in by_name else 1 if numbered.match(name) else 2, name)
+
+    unnamed = []
+    for name in sorted(hashed, key=claim_order):
+        digest = hashed[name]
+        current = holder(digest)
+        if current and current != name or any(digest == d for _, d in unnamed):
+            print(f"Removing duplicate {name}")
+            if not dry_run:
+                os.remove(os.path.join(folder, name))
+            final_names.discard(name)
+            counts['duplicates'] += 1
+            continue
+
+        previous = by_name.get(name)
+        if previous and previous != digest:
+            # Edited in place: it keeps its name, only the hash changes
+            entries.pop(previous, None)
+        if previous or (numbered.match(name) and digest not in entries):
+            # Already named, or correctly numbered and unclaimed (e.g. on the first run)
+            record(digest, name, name)
+        else:
+            unnamed.append((name, digest))
+
+    for name, digest in unnamed:
+        entry = entries.get(digest)
+        if entry and entry['name'] not in final_names:
+            # Its assigned file is gone, so these bytes take the old name back
+            target = entry['name']
+        else:
+            while True:
+                target = pattern.format(index=manifest['next_index'])
+                manifest['next_index'] += 1
+                if target not in final_names:
+                    break
+        print(f"Renaming {name} -> {target}")
+        if not dry_run:
+            os.rename(os.path.join(folder, name), os.path.join(folder, target))
+        final_names.discard(name)
+        final_names.add(target)
+        record(digest, target, name)
+        counts['renamed'] += 1
+
+    # Forget files that were deleted from the folder
+    for digest in [d for d, entry in entries.items() if entry['name'] not in final_names]:
+        del entries[digest]
+        counts['forgotten'] += 1
+
+    if not dry_run:
+        save_manifest(folder, manifest)
+    return counts
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Incrementally name bundled meme assets")
+    parser.add_argument('profiles', nargs='*', choices=sorted(PROFILES), default=sorted(PROFILES),
+                        help="Asset folders to sync (default: all)")
+    parser.add_argument('--folder', help="Override the folder for a single profile")
+    parser.add_argument('--workers', type=int, default=None, help="Hashing processes (default: CPU count)")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would change without touching files")
+    args = parser.parse_args(argv)
+
+    for profile in args.profiles:
+        settings = PROFILES[profile]
+        folder = args.folder if args.folder and len(args.profiles) == 1 else settings['folder']
+        if not os.path.isdir(folder):
+            print(f"Skipping {profile}: {folder} does not exist")
+            continue
+        counts = sync_folder(folder, settings['extensions'], settings['pattern'], args.workers, args.dry_run)
+        print(f"{profile}: " + ', '.join(f"{count} {label}" for label, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import pytest
+
+from jestr_tools import aws
+from jestr_tools.load_test import create_memes_table, local_dynamodb, start_local_aws
+
+
+class ThrottleError(Exception):
+    # Shaped like botocore's ClientError, which is all write_pipeline looks at
+    def __init__(self, code='ProvisionedThroughputExceededException'):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code, 'Message': 'injected'}}
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    # start_local_aws() overwrites these; monkeypatch puts the originals back
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_DEFAULT_REGION'):
+        monkeypatch.setenv(name, 'testing' if name != 'AWS_DEFAULT_REGION' else 'us-east-2')
+    stop = start_local_aws()
+    try:
+        yield local_dynamodb()
+    finally:
+        stop()
+        aws.reset()
+
+
+@pytest.fixture
+def memes_table(dynamodb):
+    return create_memes_table(dynamodb, 'Memes')
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Retries are exercised, not waited out
+    monkeypatch.setattr('jestr_tools.write_pipeline.backoff_delay', lambda attempt: 0)
+    monkeypatch.setattr('jestr_tools.scan_engine.backoff_delay', lambda attempt: 0)
+
+
+def write_export(path, files):
+    """Writes a DynamoDB-JSON export (data/*.json.gz), one list of items per file."""
+    import gzip
+    import json
+
+    from boto3.dynamodb.types import TypeSerializer # type: ignore
+    serializer = TypeSerializer()
+    data = path / 'data'
+    data.mkdir(parents=True)
+    for number, items in enumerate(files):
+        with gzip.open(data / f'part-{number:03d}.json.gz', 'wt', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps({'Item': {name: serializer.serialize(value) for name, value in item.items()}}) + '\n')
+    return str(path)
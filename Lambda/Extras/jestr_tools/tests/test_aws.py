@@ -0,0 +1,51 @@
+import pytest
+
+from jestr_tools import aws
+
+
+@pytest.fixture
+def profile_region(monkeypatch, tmp_path):
+    # A profile in ~/.aws/config that names a region, and nothing in the environment
+    config = tmp_path / 'config'
+    config.write_text('[default]\nregion = us-west-1\n')
+    monkeypatch.setenv('AWS_CONFIG_FILE', str(config))
+    monkeypatch.delenv('AWS_REGION', raising=False)
+    monkeypatch.delenv('AWS_DEFAULT_REGION', raising=False)
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+    monkeypatch.setitem(aws.settings, 'region', None)
+    aws.reset()
+    yield
+    aws.reset()
+
+
+def test_session_uses_the_profile_region(profile_region):
+    assert aws.session().region_name == 'us-west-1'
+
+
+def test_pin_region_overrides_the_profile(profile_region):
+    aws.session()
+    aws.pin_region()
+    assert aws.session().region_name == aws.DEFAULT_REGION
+
+
+def test_pin_region_leaves_an_explicit_region_alone(profile_region, monkeypatch):
+    monkeypatch.setenv('AWS_REGION', 'eu-west-1')
+    aws.pin_region()
+    assert aws.session().region_name == 'eu-west-1'
+
+    aws.configure(region='ap-south-1')
+    aws.pin_region()
+    assert aws.session().region_name == 'ap-south-1'
+
+
+def test_lazy_table_is_rebuilt_when_the_resource_changes(dynamodb):
+    from jestr_tools.load_test import create_memes_table
+
+    table = aws.LazyTable('Memes')
+    create_memes_table(dynamodb, 'Memes')
+    first = table._factory()
+    assert table.name == 'Memes' and table._factory() is first
+
+    aws.configure(max_attempts=aws.settings['max_attempts'])
+    assert table._factory() is not first
+    assert table.table_status == 'ACTIVE'
@@ -0,0 +1,29 @@
+from jestr_tools import process_memes
+from jestr_tools.backfill_plan import read_plan
+
+
+def test_plan_then_apply_writes_the_planned_values_and_skips_conflicts(memes_table, monkeypatch, tmp_path):
+    for i in range(3):
+        memes_table.put_item(Item={'MemeID': f'm{i}', 'Email': ''})
+    memes_table.put_item(Item={'MemeID': 'done', 'Email': 'someone@jestr.app'})
+    monkeypatch.setattr(process_memes, 'table', memes_table)
+    plan_path = str(tmp_path / 'plan.jsonl')
+
+    assert process_memes.plan_memes(plan_path, total_segments=2, max_workers=2, seed=1) == 3
+    # Planning never writes
+    assert memes_table.get_item(Key={'MemeID': 'm0'})['Item'] == {'MemeID': 'm0', 'Email': ''}
+
+    # m1 gets an email between planning and applying, so its planned update must not land
+    memes_table.update_item(Key={'MemeID': 'm1'}, UpdateExpression='SET Email = :e',
+                            ExpressionAttributeValues={':e': 'late@jestr.app'})
+    stats = process_memes.apply_plan(plan_path, write_workers=2)
+
+    assert (stats['written'], stats['conflicts'], stats['failed']) == (2, 1, 0)
+    planned = dict(read_plan(plan_path)[1])
+    assert sorted(planned) == ['m0', 'm1', 'm2']
+    for meme_id in ('m0', 'm2'):
+        item = memes_table.get_item(Key={'MemeID': meme_id})['Item']
+        assert item['Email'] == process_memes.EMAIL
+        assert item['LikeCount'] == planned[meme_id][':like_count']
+        assert item['UploadTimestamp'] == planned[meme_id][':upload_timestamp']
+    assert memes_table.get_item(Key={'MemeID': 'm1'})['Item'] == {'MemeID': 'm1', 'Email': 'late@jestr.app'}
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import pytest
+
+from jestr_tools import EXTRAS_DIR
+from jestr_tools.cli import COMMANDS
+
+# Run in a fresh interpreter, since this one has long since imported boto3
+HELP_SCRIPT = """
+import sys
+from jestr_tools.cli import main
+try:
+    main(sys.argv[1:] + ['--help'])
+except SystemExit:
+    pass
+print(' '.join(sorted({name.split('.')[0] for name in sys.modules})))
+"""
+
+
+def imported_by_help(*argv):
+    result = subprocess.run([sys.executable, '-c', HELP_SCRIPT, *argv], cwd=EXTRAS_DIR,
+                            check=True, capture_output=True, text=True)
+    return set(result.stdout.splitlines()[-1].split())
+
+
+def test_help_imports_none_of_the_heavy_dependencies():
+    assert not imported_by_help() & {'boto3', 'botocore', 'numpy', 'PIL'}
+
+
+@pytest.mark.parametrize('command', sorted(COMMANDS))
+def test_command_help_does_not_import_boto3(command):
+    assert 'boto3' not in imported_by_help(command)
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from jestr_tools.export_reader import blank_attribute, export_files, iter_export_items, iter_export_files
+
+from .conftest import write_export
+
+
+def sample_export(tmp_path):
+    return write_export(tmp_path / 'export', [
+        [{'MemeID': 'a', 'Email': '', 'LikeCount': 3, 'Tags': ['cat']},
+         {'MemeID': 'b', 'Email': 'x@y.z', 'LikeCount': 1}],
+        [{'MemeID': 'c', 'LikeCount': 0}],
+        [],
+    ])
+
+
+def test_export_files_finds_the_data_files(tmp_path):
+    path = sample_export(tmp_path)
+    files = export_files(path)
+    assert [f.rsplit('/', 1)[1] for f in files] == ['part-000.json.gz', 'part-001.json.gz', 'part-002.json.gz']
+    assert export_files(files[1]) == [files[1]]
+
+
+def test_items_decode_to_the_same_types_as_the_table_resource(tmp_path):
+    items = list(iter_export_items(sample_export(tmp_path)))
+    assert items[0] == {'MemeID': 'a', 'Email': '', 'LikeCount': Decimal(3), 'Tags': ['cat']}
+    assert [item['MemeID'] for item in items] == ['a', 'b', 'c']
+
+
+def test_iter_export_files_filters_projects_and_skips(tmp_path):
+    path = sample_export(tmp_path)
+    pages = dict(iter_export_files(path, workers=2, keep=blank_attribute('Email'), attributes=('MemeID',)))
+    # A missing Email counts as blank; b has one
+    assert pages == {0: [{'MemeID': 'a'}], 1: [{'MemeID': 'c'}], 2: []}
+
+    resumed = dict(iter_export_files(path, workers=1, skip_files={0, 2}))
+    assert list(resumed) == [1]
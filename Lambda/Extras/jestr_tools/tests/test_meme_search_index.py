@@ -0,0 +1,54 @@
+from jestr_tools.meme_search_index import IndexBuilder, SearchIndex, query_terms, tokenize, write_index
+
+
+def build_index(path, items, previous=None):
+    builder = IndexBuilder(previous)
+    builder.add_items(items)
+    write_index(path, builder.finish())
+    return builder
+
+
+ITEMS = [
+    {'MemeID': 'm1', 'Tags': ['Cat', 'Funny'], 'DetectedText': "I CAN'T EVEN"},
+    {'MemeID': 'm2', 'Tags': ['Dog', 'unclassified'], 'DetectedText': 'even a dog'},
+    {'MemeID': 'm3', 'Tags': [], 'DetectedText': ''},
+]
+
+
+def test_tokenize_and_queries_drop_the_same_one_character_words():
+    assert tokenize(['Cat'], "I CAN'T EVEN") == {'tag:cat', 'cat', 'can', 'even'}
+    assert query_terms(["can't", 'even', 'tag:Cat']) == ['can', 'even', 'tag:cat']
+
+
+def test_built_index_answers_queries(tmp_path):
+    path = str(tmp_path / 'index.idx')
+    build_index(path, ITEMS)
+
+    with SearchIndex(path) as index:
+        assert index.doc_count == 2
+        assert index.search("can't even") == ['m1']
+        assert index.search('even') == ['m1', 'm2']
+        assert index.search(['tag:dog']) == ['m2']
+        assert index.search('tag:unclassified') == []
+        assert index.search('even cat dog') == []
+
+
+def test_rebuild_reuses_unchanged_memes_and_drops_removed_ones(tmp_path):
+    path = str(tmp_path / 'index.idx')
+    build_index(path, ITEMS)
+
+    changed = [dict(ITEMS[0]), {'MemeID': 'm2', 'Tags': ['Dog'], 'DetectedText': 'sleepy dog'},
+               {'MemeID': 'm4', 'Tags': ['Bird'], 'DetectedText': ''}]
+    with SearchIndex(path) as previous:
+        builder = IndexBuilder(previous)
+        builder.add_items(changed)
+        docs = builder.finish()
+    write_index(path, docs)
+
+    assert {name: builder.counts[name] for name in ('unchanged', 'changed', 'new')} == \
+        {'unchanged': 1, 'changed': 1, 'new': 1}
+    with SearchIndex(path) as index:
+        assert index.search("can't even") == ['m1']
+        assert index.search('even') == ['m1']
+        assert index.search('sleepy') == ['m2']
+        assert index.search('tag:bird') == ['m4']
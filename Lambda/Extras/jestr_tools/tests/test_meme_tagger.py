@@ -0,0 +1,110 @@
+import threading
+
+from jestr_tools import meme_tagger
+from jestr_tools.analysis_cache import AnalysisCache
+from jestr_tools.load_test import StubRekognition, StubS3
+from jestr_tools.phash_index import PerceptualIndex
+from jestr_tools.write_pipeline import BatchWriter
+
+from .conftest import ThrottleError
+
+
+def keys(count):
+    return [f"Memes/loadtest-{i:08d}.jpg" for i in range(count)]
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.items = []
+        self._lock = threading.Lock()
+
+    def put(self, item, on_written=None):
+        with self._lock:
+            self.items.append(item)
+        if on_written:
+            on_written()
+
+    def flush(self):
+        pass
+
+
+class CountingRekognition(StubRekognition):
+    def __init__(self):
+        super().__init__(0)
+        self.analyzed = []
+
+    def detect_labels(self, **kwargs):
+        self.analyzed.append(kwargs['Image']['S3Object']['Name'])
+        return super().detect_labels(**kwargs)
+
+
+def pipeline(count, writer, rekognition=None, **kwargs):
+    return meme_tagger.TaggingPipeline(StubS3(count), rekognition or CountingRekognition(), writer, bucket='b',
+                                       workers=2, rekognition_tps=None, **kwargs)
+
+
+def test_every_listed_image_is_tagged_once():
+    writer = RecordingWriter()
+    tagged = pipeline(120, writer, listers=3).run()
+
+    assert tagged == 120
+    assert sorted(item['MemeID'] for item in writer.items) == keys(120)
+    assert {'Meme', 'Text'} <= set(writer.items[0]['Tags'])
+    assert 'LOAD TEST' in writer.items[0]['DetectedText']
+
+
+def test_clusters_are_built_around_a_representative(tmp_path):
+    index = PerceptualIndex(str(tmp_path / 'index.json'))
+    a, b, c, far = keys(4)
+    # a~b and b~c are 4 bits apart, but a and c are 8 apart
+    for key, value in ((a, 0x0), (b, 0xF), (c, 0xFF), (far, 0xFFFF0000)):
+        index.set(key, 'etag', value)
+
+    assert index.clusters(6) == [[a, b]]
+    assert index.clusters(8) == [[a, b, c]]
+
+
+def test_only_near_duplicates_of_the_analyzed_image_get_copied_tags():
+    a, b, c = keys(3)
+    hashes = {a: 0x0, b: 0xF, c: 0xFF}
+    rekognition = CountingRekognition()
+    writer = RecordingWriter()
+    # One cluster id for all three, as a chained clustering would have made
+    p = pipeline(3, writer, rekognition, clusters={key: a for key in hashes}, hashes=hashes, max_distance=6)
+    p.run()
+
+    # a is analyzed and b copies it, but c is too far from a and is analyzed itself
+    assert sorted(rekognition.analyzed) == [a, c]
+    assert p.copied == 1
+    assert len(writer.items) == 3
+
+
+def test_incremental_run_retries_images_whose_write_failed(tmp_path):
+    class Client:
+        def __init__(self, fail):
+            self.fail = fail
+
+        def batch_write_item(self, RequestItems, **kwargs):
+            if self.fail:
+                raise ThrottleError('AccessDeniedException')
+            return {'UnprocessedItems': {}, 'ConsumedCapacity': []}
+
+    class Table:
+        name = 'Memes'
+
+        def __init__(self, fail):
+            self.meta = type('Meta', (), {'client': Client(fail)})()
+
+    cache = AnalysisCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        results = []
+        for fail in (True, False, False):
+            writer = BatchWriter(Table(fail), max_retries=0)
+            p = pipeline(30, writer, cache=cache, incremental=True)
+            p.run()
+            results.append((writer.stats.as_dict()['written'], p.skipped))
+    finally:
+        cache.close()
+
+    # Nothing was written the first time, so the second run writes everything
+    assert results == [(0, 0), (30, 0), (0, 30)]
@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError # type: ignore
+
+from jestr_tools.load_test import TimedCalls, run_benchmark
+from jestr_tools.metrics import Histogram, Metrics, ProgressReporter, registry, write_summary
+
+
+def test_histogram_percentiles_land_in_the_right_bucket():
+    histogram = Histogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+
+    # Buckets are 10 per decade, so a percentile is at most ~26% above the true value
+    assert 0.050 <= histogram.percentile(0.50) < 0.050 * 1.26
+    assert 0.099 <= histogram.percentile(0.99) <= 0.100
+    assert histogram.percentile(1.0) == histogram.max == 0.1
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_summary_is_written_as_json(tmp_path):
+    metrics = Metrics()
+    metrics.incr('write.written', 3)
+    metrics.observe('dynamodb.update_item', 0.02)
+    path = tmp_path / 'metrics.json'
+
+    write_summary(str(path), metrics)
+
+    summary = json.loads(path.read_text())
+    assert summary['counters'] == {'write.written': 3}
+    latency = summary['latency']['dynamodb.update_item']
+    assert latency['count'] == 1 and latency['max_ms'] == 20.0
+    assert set(latency) == {'count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}
+
+
+def test_progress_line_counts_scan_throttles():
+    metrics = Metrics()
+    metrics.incr('scan.throttles', 2)
+    metrics.incr('write.throttles', 3)
+    reporter = ProgressReporter(metrics, stream=io.StringIO())
+    reporter._started = metrics.started
+
+    assert 'throttles 5' in reporter.line()
+
+
+def test_load_test_latency_comes_from_the_registry():
+    class Table:
+        def scan(self, **kwargs):
+            return {'Items': []}
+
+    def scan_twice():
+        timed = TimedCalls(Table(), ('scan',))
+        timed.scan()
+        timed.scan()
+        with pytest.raises(ClientError):
+            TimedCalls(Table(), ('scan',), throttle_rate=1.0).scan()
+
+    result = run_benchmark('scan', scan_twice, 2)
+    registry.reset()
+
+    assert result['latency']['scan']['count'] == 2
+    assert result['injected_throttles'] == 1
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from jestr_tools.normalize_assets import MANIFEST_NAME, normalize_folder
+
+Image = pytest.importorskip('PIL.Image')
+
+SETTINGS = {'max_dimension': 100, 'thumb_dimension': 20}
+
+
+def save(path, size):
+    Image.new('RGB', size, (200, 40, 40)).save(path, 'JPEG', quality=95)
+
+
+def normalize(folder, thumbs):
+    return normalize_folder('memes', str(folder), str(thumbs), ('.jpg', '.jpeg'), SETTINGS, workers=1)
+
+
+def test_large_images_are_resized_and_get_thumbnails(tmp_path):
+    folder, thumbs = tmp_path / 'memes', tmp_path / 'thumbs'
+    folder.mkdir()
+    save(folder / '1.jpg', (400, 200))
+
+    counts = normalize(folder, thumbs)
+
+    assert counts['normalized'] == 1 and counts['failed'] == 0
+    with Image.open(folder / '1.jpg') as image:
+        assert image.size == (100, 50)
+    with Image.open(thumbs / '1.jpg') as thumb:
+        assert thumb.size == (20, 10)
+    assert os.path.exists(folder / MANIFEST_NAME)
+
+
+def test_small_image_keeps_the_original_when_re_encoding_would_grow_it(tmp_path):
+    folder, thumbs = tmp_path / 'memes', tmp_path / 'thumbs'
+    folder.mkdir()
+    # Noisy and already heavily compressed, so quality 82 comes out bigger
+    Image.effect_noise((50, 50), 60).convert('RGB').save(folder / '1.jpg', 'JPEG', quality=20, optimize=True)
+    original = (folder / '1.jpg').read_bytes()
+
+    normalize(folder, thumbs)
+
+    assert (folder / '1.jpg').read_bytes() == original
+    assert sorted(os.listdir(folder)) == [MANIFEST_NAME, '1.jpg']
+
+
+def test_unchanged_files_are_skipped_and_removed_files_forgotten(tmp_path):
+    folder, thumbs = tmp_path / 'memes', tmp_path / 'thumbs'
+    folder.mkdir()
+    save(folder / '1.jpg', (400, 200))
+    save(folder / '2.jpg', (400, 200))
+    normalize(folder, thumbs)
+
+    os.remove(folder / '2.jpg')
+    counts = normalize(folder, thumbs)
+
+    assert (counts['unchanged'], counts['normalized'], counts['forgotten']) == (1, 0, 1)
+    assert os.listdir(thumbs) == ['1.jpg']
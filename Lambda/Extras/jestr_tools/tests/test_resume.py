@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from jestr_tools import process_memes, update_meme_captions
+from jestr_tools.run_journal import RunJournal
+
+from .conftest import write_export
+
+
+class FlakyTable:
+    # Fails update_item for a fixed set of memes, and scans in small pages
+    def __init__(self, table, failing=()):
+        self.table = table
+        self.failing = set(failing)
+        self.written = []
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def scan(self, **kwargs):
+        return self.table.scan(Limit=10, **kwargs)
+
+    def update_item(self, **kwargs):
+        meme_id = kwargs['Key']['MemeID']
+        if meme_id in self.failing:
+            raise RuntimeError('ExpiredTokenException')
+        self.written.append(meme_id)
+        return self.table.update_item(**kwargs)
+
+
+def seed(table, count):
+    items = [{'MemeID': f'm{i:04d}', 'Email': '', 'Caption': 'old'} for i in range(count)]
+    with table.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    return items
+
+
+def run_then_resume(module, run, memes_table, monkeypatch, tmp_path, failing, **kwargs):
+    journal_dir = str(tmp_path / 'journal')
+    flaky = FlakyTable(memes_table, failing)
+    monkeypatch.setattr(module, 'table', flaky)
+    with RunJournal.start('test', {'segments': 2}, journal_dir=journal_dir) as journal:
+        first = run(total_segments=2, journal=journal, **kwargs)
+
+    healthy = FlakyTable(memes_table)
+    monkeypatch.setattr(module, 'table', healthy)
+    with RunJournal.resume(journal.run_id, journal_dir=journal_dir) as journal:
+        run(total_segments=2, journal=journal, **kwargs)
+    return first, healthy.written
+
+
+@pytest.mark.parametrize('snapshot', [False, True])
+def test_update_memes_resume_redoes_failed_writes(memes_table, monkeypatch, tmp_path, snapshot):
+    items = seed(memes_table, 80)
+    failing = set(random.Random(1).sample([item['MemeID'] for item in items], 8))
+    kwargs = {'confirm': False, 'seed': 1}
+    if snapshot:
+        kwargs.update(snapshot=write_export(tmp_path / 'export', [items[:40], items[40:]]), snapshot_workers=1)
+
+    first, redone = run_then_resume(process_memes, process_memes.update_memes, memes_table, monkeypatch, tmp_path,
+                                    failing, **kwargs)
+
+    assert first['failed'] == 8
+    # Only the failed memes are written again
+    assert set(redone) == failing
+    assert all(item['Email'] == process_memes.EMAIL for item in memes_table.scan()['Items'])
+
+
+@pytest.mark.parametrize('snapshot', [False, True])
+def test_update_captions_resume_redoes_failed_writes(memes_table, monkeypatch, tmp_path, snapshot):
+    items = seed(memes_table, 60)
+    failing = {'m0003', 'm0031', 'm0059'}
+    kwargs = {}
+    if snapshot:
+        kwargs.update(snapshot=write_export(tmp_path / 'export', [items[:30], items[30:]]), snapshot_workers=1)
+
+    first, redone = run_then_resume(update_meme_captions, update_meme_captions.update_meme_captions, memes_table,
+                                    monkeypatch, tmp_path, failing, **kwargs)
+
+    assert first['failed'] == 3
+    assert set(redone) == failing
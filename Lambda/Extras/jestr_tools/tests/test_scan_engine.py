@@ -0,0 +1,85 @@
+import threading
+
+from jestr_tools.scan_engine import parallel_scan, scan_segment
+
+from .conftest import ThrottleError
+
+
+class PagedTable:
+    # Small pages so every segment takes several round trips
+    def __init__(self, table, page_size=7, throttle_first=0):
+        self.table = table
+        self.page_size = page_size
+        self.throttles_left = throttle_first
+        self.calls = 0
+
+    def scan(self, **kwargs):
+        self.calls += 1
+        if self.throttles_left:
+            self.throttles_left -= 1
+            raise ThrottleError()
+        return self.table.scan(Limit=self.page_size, **kwargs)
+
+
+def seed(table, count):
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={'MemeID': f'm{i:04d}', 'Email': ''})
+
+
+def test_parallel_scan_visits_every_item_once_across_pages(memes_table):
+    seed(memes_table, 120)
+    seen = []
+    lock = threading.Lock()
+    checkpoints = []
+
+    def process_page(segment, items):
+        with lock:
+            seen.extend(item['MemeID'] for item in items)
+
+    total = parallel_scan(PagedTable(memes_table), process_page, total_segments=4, max_workers=4,
+                          checkpoint=lambda segment, key: checkpoints.append((segment, key)))
+
+    assert total == 120
+    assert sorted(seen) == [f'm{i:04d}' for i in range(120)]
+    # Every segment ends with a finished checkpoint
+    assert {segment for segment, key in checkpoints if key is None} == {0, 1, 2, 3}
+
+
+def test_parallel_scan_resumes_from_start_keys_and_skips_finished_segments(memes_table):
+    seed(memes_table, 40)
+    paged = PagedTable(memes_table, page_size=5)
+    first_page = paged.scan(Segment=0, TotalSegments=2)
+    seen = []
+
+    parallel_scan(paged, lambda segment, items: seen.extend(i['MemeID'] for i in items), total_segments=2,
+                  start_keys={0: first_page['LastEvaluatedKey']}, skip_segments={1})
+
+    assert not set(seen) & {item['MemeID'] for item in first_page['Items']}
+    assert len(seen) + len(first_page['Items']) == len(memes_table.scan(Segment=0, TotalSegments=2)['Items'])
+
+
+def test_throttled_scan_is_retried(memes_table):
+    seed(memes_table, 10)
+    paged = PagedTable(memes_table, page_size=100, throttle_first=3)
+
+    assert scan_segment(paged, 0, 1, lambda segment, items: None) == 10
+    assert paged.calls == 4
+
+
+def test_failed_page_holds_the_checkpoint(memes_table):
+    seed(memes_table, 30)
+    checkpoints = []
+    pages = []
+
+    def process_page(segment, items):
+        pages.append(items)
+        # Only the second page has failed writes
+        return len(pages) != 2
+
+    scan_segment(PagedTable(memes_table, page_size=10), 0, 1, process_page,
+                 checkpoint=lambda segment, key: checkpoints.append(key))
+
+    assert len(pages) == 3
+    # Only the page before the failure is checkpointed; the segment never finishes
+    assert len(checkpoints) == 1 and checkpoints[0] is not None
@@ -0,0 +1,46 @@
+import os
+
+from jestr_tools.sync_assets import PROFILES, sync_folder
+
+PATTERN = PROFILES['memes']['pattern']
+EXTENSIONS = PROFILES['memes']['extensions']
+
+
+def make(folder, files):
+    for name, data in files.items():
+        (folder / name).write_bytes(data)
+
+
+def sync(folder):
+    return sync_folder(str(folder), EXTENSIONS, PATTERN)
+
+
+def test_a_copy_of_a_numbered_file_is_removed_not_the_numbered_file(tmp_path):
+    make(tmp_path, {'12.jpeg': b'same', '1 copy.jpeg': b'same', '1.jpeg': b'one', 'new.jpg': b'new'})
+
+    counts = sync(tmp_path)
+
+    assert sorted(os.listdir(tmp_path)) == ['.asset-manifest.json', '1.jpeg', '12.jpeg', '13.jpeg']
+    assert (tmp_path / '12.jpeg').read_bytes() == b'same'
+    assert counts['duplicates'] == 1 and counts['renamed'] == 1
+
+
+def test_existing_names_never_move(tmp_path):
+    make(tmp_path, {'1.jpeg': b'one', '2.jpeg': b'two'})
+    sync(tmp_path)
+
+    # A copy of a named file, a new file and a deleted file in one run
+    make(tmp_path, {'again.jpeg': b'two', 'fresh.jpeg': b'three'})
+    os.remove(tmp_path / '1.jpeg')
+    counts = sync(tmp_path)
+
+    assert (tmp_path / '2.jpeg').read_bytes() == b'two'
+    assert (tmp_path / '3.jpeg').read_bytes() == b'three'
+    assert not (tmp_path / 'again.jpeg').exists()
+    assert counts == {'unchanged': 1, 'hashed': 2, 'renamed': 1, 'duplicates': 1, 'forgotten': 1}
+
+
+def test_unchanged_folder_is_not_rehashed(tmp_path):
+    make(tmp_path, {'a.jpeg': b'a', 'b.jpeg': b'b'})
+    sync(tmp_path)
+    assert sync(tmp_path) == {'unchanged': 2, 'hashed': 0, 'renamed': 0, 'duplicates': 0, 'forgotten': 0}
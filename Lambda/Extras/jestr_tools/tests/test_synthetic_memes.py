@@ -0,0 +1,41 @@
+from collections import Counter
+
+import pytest
+
+from jestr_tools.process_memes import PROFILE_PIC_URL, generate_meme_values_batch
+from jestr_tools.synthetic_memes import BACKFILL_CAPTIONS, BLANK_CAPTION_RATE, CAPTION_TYPES, SyntheticMemes
+
+
+def category_shares(captions, categories):
+    # Blank captions count as category -1
+    category_of = {caption: number for number, category in enumerate(categories) for caption in category}
+    counts = Counter(category_of.get(caption, -1) for caption in captions)
+    return {number: count / len(captions) for number, count in counts.items()}
+
+
+def test_same_seed_gives_the_same_columns():
+    assert SyntheticMemes(7).engagement(500) == SyntheticMemes(7).engagement(500)
+    assert SyntheticMemes(7).engagement(500) != SyntheticMemes(8).engagement(500)
+
+
+def test_backfill_values_are_reproducible_and_shaped_like_an_update():
+    values = generate_meme_values_batch(3, SyntheticMemes(1))
+
+    assert values == generate_meme_values_batch(3, SyntheticMemes(1))
+    assert values[0][':profile_pic_url'] == PROFILE_PIC_URL
+    assert all(0 <= row[':like_count'] <= 1337 and row[':upload_timestamp'].endswith('.000Z') for row in values)
+
+
+def test_backfill_captions_are_mostly_blank_with_even_categories():
+    shares = category_shares(SyntheticMemes(3).backfill_captions(40000), BACKFILL_CAPTIONS)
+
+    assert shares[-1] == pytest.approx(BLANK_CAPTION_RATE, abs=0.01)
+    for number in range(len(BACKFILL_CAPTIONS)):
+        assert shares[number] == pytest.approx((1 - BLANK_CAPTION_RATE) / len(BACKFILL_CAPTIONS), abs=0.01)
+
+
+def test_caption_types_are_picked_evenly():
+    shares = category_shares(SyntheticMemes(3).captions(40000), CAPTION_TYPES[1:])
+
+    for share in shares.values():
+        assert share == pytest.approx(1 / len(CAPTION_TYPES), abs=0.01)
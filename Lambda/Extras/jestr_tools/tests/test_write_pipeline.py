@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from jestr_tools.write_pipeline import BatchWriter, UpdateWorkers, diff_update
+
+from .conftest import ThrottleError
+
+
+def test_diff_update_is_none_when_nothing_changes():
+    current = {'MemeID': 'm1', 'Caption': 'Lol', 'LikeCount': Decimal(3)}
+    assert diff_update({'MemeID': 'm1'}, current, {'Caption': 'Lol', 'LikeCount': 3}) is None
+
+
+def test_diff_update_sets_only_changed_attributes_guarded_by_what_was_read():
+    current = {'MemeID': 'm1', 'Email': '', 'LikeCount': Decimal(3)}
+    update = diff_update({'MemeID': 'm1'}, current, {'Email': 'a@b.c', 'LikeCount': 3, 'Status': 'active'})
+
+    names = update['ExpressionAttributeNames']
+    values = update['ExpressionAttributeValues']
+    assert sorted(names.values()) == ['Email', 'MemeID', 'Status']
+    assert 'ReturnValues' not in update
+    assert update['UpdateExpression'] == 'SET #a0 = :v0, #a1 = :v1'
+    # Email was read as '', Status wasn't there, and the item must still exist
+    assert update['ConditionExpression'] == 'attribute_exists(#k) AND #a0 = :o0 AND attribute_not_exists(#a1)'
+    assert values == {':v0': 'a@b.c', ':o0': '', ':v1': 'active'}
+
+
+def test_diff_update_conflicts_instead_of_clobbering_a_concurrent_write(memes_table):
+    memes_table.put_item(Item={'MemeID': 'm1', 'LikeCount': 3})
+    memes_table.put_item(Item={'MemeID': 'm2', 'Caption': 'old'})
+    read = [memes_table.get_item(Key={'MemeID': key})['Item'] for key in ('m1', 'm2')]
+    # The app bumps m1's LikeCount between the read and the write
+    memes_table.update_item(Key={'MemeID': 'm1'}, UpdateExpression='SET LikeCount = LikeCount + :one',
+                            ExpressionAttributeValues={':one': 1})
+
+    with UpdateWorkers(memes_table) as writer:
+        conflicted = writer.submit(**diff_update({'MemeID': 'm1'}, read[0], {'LikeCount': 100}))
+        written = writer.submit(**diff_update({'MemeID': 'm2'}, read[1], {'Caption': 'new'}))
+        # A meme deleted since it was read must not be recreated
+        deleted = writer.submit(**diff_update({'MemeID': 'gone'}, {'MemeID': 'gone'}, {'Caption': 'new'}))
+
+    assert conflicted.result() is None and deleted.result() is None
+    assert written.result() is True
+    assert writer.stats.as_dict()['conflicts'] == 2
+    assert memes_table.get_item(Key={'MemeID': 'm1'})['Item']['LikeCount'] == 4
+    assert memes_table.get_item(Key={'MemeID': 'm2'})['Item']['Caption'] == 'new'
+    assert 'Item' not in memes_table.get_item(Key={'MemeID': 'gone'})
+
+
+def test_update_workers_report_failures_as_false():
+    class Broken:
+        def update_item(self, **kwargs):
+            raise RuntimeError('ExpiredToken')
+
+    with UpdateWorkers(Broken()) as writer:
+        future = writer.submit(Key={'MemeID': 'm1'}, UpdateExpression='SET Caption = :c')
+    assert future.result() is False
+    assert writer.stats.as_dict()['failed'] == 1
+
+
+class FakeBatchClient:
+    # First call leaves the first item unprocessed; `fail` rejects every call
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.calls = 0
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise self.fail
+        requests = RequestItems['Memes']
+        unprocessed = requests[:1] if self.calls == 1 else []
+        return {'UnprocessedItems': {'Memes': unprocessed} if unprocessed else {}, 'ConsumedCapacity': []}
+
+
+class FakeTable:
+    name = 'Memes'
+
+    def __init__(self, client):
+        self.meta = type('Meta', (), {'client': client})()
+
+
+def test_batch_writer_calls_on_written_only_once_an_item_is_accepted():
+    written = []
+    writer = BatchWriter(FakeTable(FakeBatchClient()))
+    with writer:
+        for i in range(3):
+            writer.put({'MemeID': f'm{i}'}, on_written=lambda i=i: written.append(i))
+
+    # m0 was unprocessed the first time and only accepted on the retry
+    assert written == [1, 2, 0]
+    assert writer.stats.as_dict()['written'] == 3
+
+
+def test_batch_writer_skips_on_written_for_failed_batches():
+    written = []
+    writer = BatchWriter(FakeTable(FakeBatchClient(fail=ThrottleError())), max_retries=1)
+    with writer:
+        writer.put({'MemeID': 'm0'}, on_written=lambda: written.append(0))
+
+    assert written == []
+    assert writer.stats.as_dict()['failed'] == 1
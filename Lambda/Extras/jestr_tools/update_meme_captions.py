@@ -0,0 +1,147 @@
+import argparse
+import logging
+import threading
+
+from . import aws, metrics
+from .aws import LazyTable
+from .scan_engine import parallel_scan, DEFAULT_SEGMENTS, DEFAULT_WORKERS
+from .write_pipeline import UpdateWorkers, diff_update, DEFAULT_UPDATE_WORKERS, DEFAULT_MAX_IN_FLIGHT
+from .run_journal import RunJournal, JOURNAL_DIR
+from .export_reader import iter_export_files
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Created on first use, from the shared session in aws.py. main() keeps this
+# script on us-east-2, where it always ran, unless --region or AWS_REGION says otherwise.
+table = LazyTable('Memes')
+
+
+# Shared batch generator; captions for a page are drawn in one go. Made on
+# first use so importing this module doesn't load numpy.
+_synthetic = None
+_synthetic_lock = threading.Lock()
+
+def draw_captions(n):
+    global _synthetic
+    with _synthetic_lock:
+        if _synthetic is None:
+            from .synthetic_memes import SyntheticMemes
+            _synthetic = SyntheticMemes()
+        return _synthetic.captions(n)
+
+# Memes in a snapshot may have been deleted since; update_item would recreate them
+SNAPSHOT_CONDITION = 'attribute_exists(MemeID)'
+
+# Function to update the captions for one page of scanned items
+def update_page_captions(writer, items, journal=None, condition=None, diff=False):
+    if journal:
+        items = [item for item in items if item['MemeID'] not in journal.committed]
+    if diff:
+        # Only memes without a Caption get one; the rest never reach the table
+        missing = [item for item in items if 'Caption' not in item]
+        writer.skip(len(items) - len(missing))
+        items = missing
+    pending = []
+    for item, new_caption in zip(items, draw_captions(len(items))):
+        meme_id = item['MemeID']
+        
+        if diff:
+            # Conditioned on the Caption still being missing and the meme still existing
+            update = diff_update({'MemeID': meme_id}, item, {'Caption': new_caption})
+        else:
+            update = {
+                'Key': {'MemeID': meme_id},
+                'UpdateExpression': "set Caption = :c",
+                'ExpressionAttributeValues': {':c': new_caption}
+            }
+            if condition:
+                update['ConditionExpression'] = condition
+        future = writer.submit(**update)
+        pending.append((meme_id, future))
+        logger.debug(f"Queued MemeID: {meme_id} with caption: {new_caption}")
+    
+    # Wait for the whole page so the segment checkpoint never runs ahead of the
+    # writes. Returns False if any of them failed.
+    written = True
+    for meme_id, future in pending:
+        result = future.result()
+        if result and journal:
+            journal.record_committed(meme_id)
+        written = written and result is not False
+    return written
+
+# Function to update meme captions
+def update_meme_captions(total_segments=DEFAULT_SEGMENTS, max_workers=DEFAULT_WORKERS, write_workers=DEFAULT_UPDATE_WORKERS,
+                         max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_wcu=None, journal=None, snapshot=None, snapshot_workers=None,
+                         diff=False):
+    # Diff mode reads the current Caption along with the key
+    attributes = ('MemeID', 'Caption') if diff else ('MemeID',)
+    from botocore.exceptions import ClientError # type: ignore
+    try:
+        with UpdateWorkers(table, max_workers=write_workers, max_in_flight=max_in_flight, max_wcu_per_second=max_wcu) as writer:
+            if snapshot:
+                # MemeIDs come from a local export, so the table only sees the writes.
+                # Export file numbers are checkpointed like scan segments.
+                pages = iter_export_files(snapshot, workers=snapshot_workers, attributes=attributes,
+                                          skip_files=journal.finished_segments if journal else ())
+                for file_number, items in pages:
+                    # A file with failed writes isn't marked finished, so a resume redoes it
+                    written = update_page_captions(writer, items, journal, condition=SNAPSHOT_CONDITION, diff=diff)
+                    if written and journal:
+                        journal.checkpoint(file_number, None)
+            else:
+                parallel_scan(
+                    table,
+                    lambda segment, items: update_page_captions(writer, items, journal, diff=diff),
+                    total_segments=total_segments,
+                    max_workers=max_workers,
+                    scan_kwargs={'ProjectionExpression': ', '.join(attributes)},
+                    start_keys=journal.start_keys if journal else None,
+                    skip_segments=journal.finished_segments if journal else (),
+                    checkpoint=journal.checkpoint if journal else None
+                )
+        stats = writer.stats.as_dict()
+        logger.info(f"Updated {stats['written']} captions ({stats['failed']} failed, {stats['conflicts']} changed since read, "
+                    f"{stats['skipped']} already captioned, {stats['retries']} retries, {stats['consumed_wcu']:.1f} WCU consumed)")
+        return stats
+    except ClientError as e:
+        logger.error(f"Couldn't scan table. Here's why: {e.response['Error']['Message']}")
+
+# Run the update function
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Regenerate captions for every meme")
+    parser.add_argument('--snapshot', metavar='EXPORT_DIR', help="Read MemeIDs from a local DynamoDB export instead of scanning the table")
+    parser.add_argument('--snapshot-workers', type=int, default=None, help="Processes decoding export files (default: CPU count)")
+    parser.add_argument('--diff', action='store_true', help="Only caption memes that have no Caption yet, skipping the rest")
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help="Parallel scan segments")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Scan worker threads")
+    parser.add_argument('--write-workers', type=int, default=DEFAULT_UPDATE_WORKERS, help="Concurrent update_item workers")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Max queued or running updates")
+    parser.add_argument('--max-wcu', type=float, default=None, help="Cap on consumed write capacity units per second")
+    parser.add_argument('--resume', metavar='RUN_ID', help="Resume an interrupted run from its journal")
+    parser.add_argument('--journal-dir', default=JOURNAL_DIR, help="Where run journals are kept")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    aws.pin_region()
+    
+    if args.resume:
+        journal = RunJournal.resume(args.resume, journal_dir=args.journal_dir)
+        # Segment checkpoints only line up with the segment count they were taken with
+        args.segments = journal.params.get('segments', args.segments)
+        args.snapshot = args.snapshot or journal.params.get('snapshot')
+        args.diff = args.diff or journal.params.get('diff', False)
+    else:
+        journal = RunJournal.start('update_meme_captions', {'segments': args.segments, 'snapshot': args.snapshot, 'diff': args.diff},
+                                   journal_dir=args.journal_dir)
+    logger.info(f"Run ID: {journal.run_id} (resume with --resume {journal.run_id})")
+    
+    # item_count comes from DescribeTable and is only refreshed every few hours, but it's close enough for an ETA
+    with journal, metrics.reporting(args, total=table.item_count):
+        update_meme_captions(total_segments=args.segments, max_workers=args.workers, write_workers=args.write_workers,
+                             max_in_flight=args.max_in_flight, max_wcu=args.max_wcu, journal=journal,
+                             snapshot=args.snapshot, snapshot_workers=args.snapshot_workers, diff=args.diff)
+
+if __name__ == "__main__":
+    main()
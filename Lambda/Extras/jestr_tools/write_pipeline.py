@@ -0,0 +1,331 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# BatchWriteItem accepts at most 25 put/delete requests per call
+BATCH_SIZE = 25
+DEFAULT_UPDATE_WORKERS = 16
+DEFAULT_MAX_IN_FLIGHT = 64
+MAX_RETRIES = 8
+BASE_DELAY = 0.05
+MAX_DELAY = 5.0
+
+THROTTLE_ERRORS = (
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+)
+
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    # Full jitter: sleep a random amount up to the exponential ceiling
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def error_code(error):
+    # botocore's ClientError carries the service's error code in .response;
+    # read it off the exception so this module doesn't have to import botocore
+    response = getattr(error, 'response', None)
+    return response.get('Error', {}).get('Code') if isinstance(response, dict) else None
+
+
+def is_throttle_error(error):
+    return error_code(error) in THROTTLE_ERRORS
+
+
+def is_condition_failure(error):
+    return error_code(error) == 'ConditionalCheckFailedException'
+
+
+def diff_update(key, current, desired):
+    """Builds update_item kwargs that set only the attributes in desired whose
+    value differs from current (the item as read), or returns None if nothing
+    would change.
+
+    The update is conditioned on the item still existing and on every changed
+    attribute still holding the value that was read, so a write that lands in
+    between (a LikeCount increment from the app, say) makes it a conflict
+    instead of being overwritten. No ReturnValues are asked for.
+    """
+    changed = [(name, value) for name, value in desired.items() if name not in current or current[name] != value]
+    if not changed:
+        return None
+    # Placeholders for every name, since several attributes (Status, ...) are reserved words
+    names = {'#k': next(iter(key))}
+    values = {}
+    assignments = []
+    conditions = ['attribute_exists(#k)']
+    for i, (name, value) in enumerate(changed):
+        names[f'#a{i}'] = name
+        values[f':v{i}'] = value
+        assignments.append(f'#a{i} = :v{i}')
+        if name in current:
+            values[f':o{i}'] = current[name]
+            conditions.append(f'#a{i} = :o{i}')
+        else:
+            conditions.append(f'attribute_not_exists(#a{i})')
+    return {
+        'Key': key,
+        'UpdateExpression': 'SET ' + ', '.join(assignments),
+        'ConditionExpression': ' AND '.join(conditions),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+    }
+
+
+def consumed_units(response):
+    consumed = response.get('ConsumedCapacity') or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(c.get('CapacityUnits', 0) for c in consumed)
+
+
+class WriteStats:
+    # Per-writer totals; every update is mirrored into the shared metrics registry as write.<name>
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.conflicts = 0
+        self.skipped = 0
+        self.retries = 0
+        self.throttles = 0
+        self.consumed_wcu = 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+        for name, value in counts.items():
+            registry.incr(f'write.{name}', value)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'written': self.written,
+                'failed': self.failed,
+                'conflicts': self.conflicts,
+                'skipped': self.skipped,
+                'retries': self.retries,
+                'throttles': self.throttles,
+                'consumed_wcu': self.consumed_wcu,
+            }
+
+
+class CapacityLimiter:
+    """Token bucket that caps units per second across all threads sharing it.
+
+    Write capacity is only known after a write returns, so writers wait()
+    before a request and consume() what DynamoDB reported afterwards. Going
+    over budget puts the limiter in debt and the next wait() sleeps it off.
+    When the cost is known up front (e.g. one API call = one unit), acquire()
+    takes the tokens atomically instead.
+    """
+
+    def __init__(self, max_units_per_second):
+        self.rate = float(max_units_per_second)
+        # Allow at least one whole unit to accumulate, even for sub-1/s rates
+        self.capacity = max(self.rate, 1.0)
+        self._lock = threading.Lock()
+        self._balance = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._balance = min(self.capacity, self._balance + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._balance > 0:
+                    return
+                delay = -self._balance / self.rate
+            time.sleep(max(delay, 0.001))
+
+    def acquire(self, units=1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._balance >= units:
+                    self._balance -= units
+                    return
+                delay = (units - self._balance) / self.rate
+            time.sleep(max(delay, 0.001))
+
+    def consume(self, units):
+        with self._lock:
+            self._refill()
+            self._balance -= units
+
+
+def make_limiter(max_wcu_per_second):
+    return CapacityLimiter(max_wcu_per_second) if max_wcu_per_second else None
+
+
+class BatchWriter:
+    """Buffers full-item puts and sends them with BatchWriteItem in groups of 25.
+
+    UnprocessedItems are resent with jittered exponential backoff, as are whole
+    batches rejected for throughput. Safe to share between scan worker threads.
+    An item's on_written callback runs only once DynamoDB has accepted it, from
+    whichever thread sent its batch.
+    """
+
+    def __init__(self, table, max_wcu_per_second=None, max_retries=MAX_RETRIES):
+        self.table = table
+        self.client = table.meta.client
+        self.max_retries = max_retries
+        self.limiter = make_limiter(max_wcu_per_second)
+        self.stats = WriteStats()
+        self._lock = threading.Lock()
+        self._buffer = []
+
+    def put(self, item, on_written=None):
+        batch = None
+        with self._lock:
+            self._buffer.append(({'PutRequest': {'Item': item}}, on_written))
+            if len(self._buffer) >= BATCH_SIZE:
+                batch, self._buffer = self._buffer[:BATCH_SIZE], self._buffer[BATCH_SIZE:]
+        if batch:
+            self._send(batch)
+
+    def flush(self):
+        while True:
+            with self._lock:
+                batch, self._buffer = self._buffer[:BATCH_SIZE], self._buffer[BATCH_SIZE:]
+            if not batch:
+                return
+            self._send(batch)
+
+    def _send(self, requests):
+        # requests holds (request, on_written) pairs
+        attempt = 0
+        while requests:
+            if self.limiter:
+                self.limiter.wait()
+            try:
+                with registry.timer('dynamodb.batch_write_item'):
+                    response = self.client.batch_write_item(
+                        RequestItems={self.table.name: [request for request, _ in requests]},
+                        ReturnConsumedCapacity='TOTAL'
+                    )
+            except Exception as e:
+                if not is_throttle_error(e) or attempt >= self.max_retries:
+                    logger.error(f"Batch write of {len(requests)} items failed: {str(e)}")
+                    self.stats.add(failed=len(requests))
+                    return
+                self.stats.add(throttles=1, retries=1)
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            units = consumed_units(response)
+            if self.limiter:
+                self.limiter.consume(units)
+            unprocessed = response.get('UnprocessedItems', {}).get(self.table.name, [])
+            self.stats.add(written=len(requests) - len(unprocessed), consumed_wcu=units)
+            # UnprocessedItems echoes the requests back, so match them up by value
+            remaining = [(request, on_written) for request, on_written in requests if request in unprocessed]
+            for request, on_written in requests:
+                if on_written and request not in unprocessed:
+                    on_written()
+
+            if not remaining:
+                return
+            if attempt >= self.max_retries:
+                logger.error(f"Giving up on {len(remaining)} unprocessed items after {attempt} retries")
+                self.stats.add(failed=len(remaining))
+                return
+            self.stats.add(retries=1)
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+            requests = remaining
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+class UpdateWorkers:
+    """Runs attribute-only update_item calls on a worker pool.
+
+    At most max_in_flight updates are queued or running at once; submit()
+    blocks when the window is full so a fast scan can't build an unbounded
+    backlog in memory. Updates rejected by their ConditionExpression are
+    counted as conflicts rather than failures; updates a caller elided
+    because nothing would change are counted with skip().
+    """
+
+    def __init__(self, table, max_workers=DEFAULT_UPDATE_WORKERS, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 max_wcu_per_second=None, max_retries=MAX_RETRIES):
+        self.table = table
+        self.max_retries = max_retries
+        self.limiter = make_limiter(max_wcu_per_second)
+        self.stats = WriteStats()
+        self._window = threading.BoundedSemaphore(max(max_in_flight, max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='update')
+
+    def submit(self, **update_kwargs):
+        """Queue a table.update_item(**update_kwargs) call. Returns a Future that
+        resolves to True if the update was written, None if its condition no
+        longer held (nothing left to do) and False if it failed."""
+        self._window.acquire()
+        try:
+            future = self._executor.submit(self._update, update_kwargs)
+        except Exception:
+            self._window.release()
+            raise
+        future.add_done_callback(lambda _: self._window.release())
+        return future
+
+    def skip(self, count=1):
+        if count:
+            self.stats.add(skipped=count)
+
+    def _update(self, update_kwargs):
+        key = update_kwargs.get('Key')
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.wait()
+            try:
+                with registry.timer('dynamodb.update_item'):
+                    response = self.table.update_item(ReturnConsumedCapacity='TOTAL', **update_kwargs)
+            except Exception as e:
+                if is_condition_failure(e):
+                    logger.debug(f"Skipped {key}: condition no longer holds")
+                    self.stats.add(conflicts=1)
+                    return None
+                if not is_throttle_error(e) or attempt >= self.max_retries:
+                    logger.error(f"Error updating {key}: {str(e)}")
+                    self.stats.add(failed=1)
+                    return False
+                self.stats.add(throttles=1, retries=1)
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            units = consumed_units(response)
+            if self.limiter:
+                self.limiter.consume(units)
+            self.stats.add(written=1, consumed_wcu=units)
+            return True
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,24 +1,14 @@
 import os
+import sys
 
-# Adjust the path to point to the correct location of the 'memes' folder
-folder_path = os.path.join(os.path.dirname(__file__), '../assets/memes')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../Lambda/Extras'))
 
-# List all files in the folder and filter for .jpg or .jpeg files
-files = [f for f in os.listdir(folder_path) if f.lower().endswith(('.jpg', '.jpeg'))]
+from jestr_tools.sync_assets import PROFILES, sync_folder
 
-# Sort files to ensure sequential order
-files.sort()
+# Names new .jpg/.jpeg files in the 'memes' folder sequentially. Files that
+# already have a name keep it; see jestr_tools/sync_assets.py for the manifest details.
+if __name__ == "__main__":
+    settings = PROFILES['memes']
+    counts = sync_folder(settings['folder'], settings['extensions'], settings['pattern'])
 
-# Iterate over the sorted files and rename them sequentially
-for index, filename in enumerate(files, start=1):
-    # Create the new filename with sequential numbering
-    new_filename = f"{index}.jpeg"
-    
-    # Construct full file paths
-    old_file = os.path.join(folder_path, filename)
-    new_file = os.path.join(folder_path, new_filename)
-    
-    # Rename the file
-    os.rename(old_file, new_file)
-
-print("Files have been renamed successfully!")
+    print(f"Files have been renamed successfully! ({counts['renamed']} renamed, {counts['duplicates']} duplicates removed)")